@@ -1,5 +1,20 @@
+import sys
+
 from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
+
+    def ready(self):
+        from django.conf import settings
+        from utils.logging_queue import install_queue_logging
+        
+        # The test runner keeps logging synchronous and starts no listeners
+        if sys.argv[1:2] == ['test']:
+            return
+        
+        install_queue_logging(
+            getattr(settings, 'QUEUED_LOGGERS', []),
+            getattr(settings, 'LOGGING_QUEUE_SIZE', 10000)
+        )
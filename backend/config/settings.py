@@ -228,6 +228,9 @@ LOGGING = {
             'format': '{levelname} {asctime} {name} {module} {funcName} {lineno} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'utils.logging_formatters.JSONFormatter',
+        },
     },
     'filters': {
         'require_debug_true': {
@@ -269,19 +272,19 @@ LOGGING = {
         },
         'security_file': {
             'level': 'WARNING',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'utils.logging_queue.BufferedRotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'security.log',
             'maxBytes': 1024 * 1024 * 10,  # 10 MB
             'backupCount': 10,
-            'formatter': 'detailed',
+            'formatter': 'json',  # One JSON object per line for log tooling
         },
         'slow_query_file': {
             'level': 'WARNING',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'utils.logging_queue.BufferedRotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'slow_queries.log',
             'maxBytes': 1024 * 1024 * 10,  # 10 MB
             'backupCount': 5,
-            'formatter': 'detailed',
+            'formatter': 'json',  # One JSON object per line for log tooling
         },
     },
     'loggers': {
@@ -332,6 +335,12 @@ LOGGING = {
     },
 }
 
+# Loggers whose handlers are drained by a background QueueListener thread,
+# so file/stream writes happen off the request thread. The security and slow
+# query file handlers are buffered and rely on the listener to flush them.
+QUEUED_LOGGERS = ['django.security', 'django.db.backends']
+LOGGING_QUEUE_SIZE = 10000  # Records buffered per logger before dropping
+
 # Database Query Logging Configuration
 # Log queries that take longer than this threshold (in seconds)
 SLOW_QUERY_THRESHOLD = config('SLOW_QUERY_THRESHOLD', default=1.0, cast=float)
@@ -396,6 +405,12 @@ if REDIS_URL:
             },
             'KEY_PREFIX': 'vaitikan',
             'TIMEOUT': 300,  # Default timeout: 5 minutes
+        },
+        # Dedicated alias; counts each rate limit check in one Lua call
+        'ratelimit': {
+            'BACKEND': 'utils.rate_limiting.RateLimitRedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'vaitikan-rl',
         }
     }
 else:
@@ -408,6 +423,10 @@ else:
                 'MAX_ENTRIES': 1000,
             },
             'TIMEOUT': 300,  # Default timeout: 5 minutes
+        },
+        'ratelimit': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'vaitikan-ratelimit',
         }
     }
 
@@ -417,7 +436,7 @@ CACHE_MIDDLEWARE_SECONDS = 300
 
 # Rate Limiting
 RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', default=True, cast=bool)
-RATELIMIT_USE_CACHE = 'default'  # Use default cache for rate limiting
+RATELIMIT_USE_CACHE = 'ratelimit'  # Dedicated cache alias for rate limit counters
 
 # File Upload Security
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5 MB
@@ -9,7 +9,7 @@ import logging
 import hmac
 import hashlib
 from decimal import Decimal
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -231,7 +231,53 @@ class PaymentService(BaseService):
         except Exception as e:
             cls.log_error(f"Signature verification error: {str(e)}", exc_info=True)
             return False
-    
+
+    @classmethod
+    def verify_signatures_batch(
+        cls,
+        triples: List[Tuple[str, str, str]]
+    ) -> List[bool]:
+        """
+        Verify several Razorpay payment signatures in one pass.
+
+        The HMAC is keyed once and the keyed state is copied for each
+        signature, so the key setup is not repeated per verification.
+
+        Args:
+            triples: List of (razorpay_order_id, razorpay_payment_id,
+                razorpay_signature) tuples
+
+        Returns:
+            List of booleans, one per tuple, True where the signature is valid.
+            As in verify_payment_signature, an entry that cannot be verified
+            (e.g. a missing signature) is False rather than failing the batch.
+        """
+        cls.log_info(f"Verifying {len(triples)} payment signatures")
+
+        try:
+            base = hmac.new(
+                cls.RAZORPAY_KEY_SECRET.encode('utf-8'),
+                b'',
+                hashlib.sha256
+            )
+        except Exception as e:
+            cls.log_error(f"Signature verification error: {str(e)}", exc_info=True)
+            return [False] * len(triples)
+
+        results = []
+        for razorpay_order_id, razorpay_payment_id, razorpay_signature in triples:
+            try:
+                signer = base.copy()
+                signer.update(f"{razorpay_order_id}|{razorpay_payment_id}".encode('utf-8'))
+                results.append(
+                    hmac.compare_digest(signer.hexdigest(), razorpay_signature)
+                )
+            except Exception as e:
+                cls.log_error(f"Signature verification error: {str(e)}", exc_info=True)
+                results.append(False)
+
+        return results
+
     @classmethod
     def _get_payment_method_from_razorpay(cls, razorpay_payment_id: str) -> str:
         """
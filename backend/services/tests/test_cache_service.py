@@ -287,6 +287,27 @@ class CacheServiceTestCase(TestCase):
         cached = CacheService.get_product_list_cache({})
         self.assertIsNotNone(cached)  # Same as None since both mean "no filters"
         self.assertEqual(cached, product_data)
+    
+    def test_cache_key_ignores_filter_order(self):
+        """Test that filter dicts with the same items share a cache entry"""
+        product_data = [{'id': 1, 'name': 'Product 1'}]
+        
+        CacheService.set_product_list_cache(
+            product_data, {'fabric': 'cotton', 'color': 'blue'}
+        )
+        
+        # Same filters inserted in a different order should hit the cache
+        cached = CacheService.get_product_list_cache({'color': 'blue', 'fabric': 'cotton'})
+        self.assertEqual(cached, product_data)
+        
+        # Order is also ignored in dicts nested inside lists and tuples
+        CacheService.set_product_list_cache(
+            product_data, {'variants': [{'size': 'M', 'color': 'red'}], 'range': ({'min': 1, 'max': 5},)}
+        )
+        cached = CacheService.get_product_list_cache(
+            {'range': ({'max': 5, 'min': 1},), 'variants': [{'color': 'red', 'size': 'M'}]}
+        )
+        self.assertEqual(cached, product_data)
 
 
 if __name__ == '__main__':
@@ -10,16 +10,20 @@ from hypothesis.extra.django import TestCase
 from decimal import Decimal
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from unittest.mock import patch, MagicMock
-import uuid
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import patch
+import hashlib
+import hmac
+import secrets
 
-from apps.orders.models import Cart, Order, OrderItem
+from apps.orders.models import Cart
 from apps.products.models import (
     Product, ProductVariant, VariantSize, Size, Stock,
     Fabric, Color, Pattern, Sleeve, Pocket
 )
 from apps.users.models import Address, Country, State, City, PostalCode
-from apps.finance.models import Payment, TaxConfiguration
+from apps.finance.models import TaxConfiguration
 from services.payment_service import PaymentService
 from services.order_service import OrderService
 from services.cart_service import CartService
@@ -27,10 +31,13 @@ from services.cart_service import CartService
 
 User = get_user_model()
 
+HALF = Decimal('0.5')
+TWO_PLACES = Decimal('0.01')
+
 
 def create_test_variant_size(stock_quantity, base_price=Decimal('500.00')):
     """Helper to create a VariantSize with Stock for testing"""
-    unique_id = uuid.uuid4().hex[:6]
+    unique_id = secrets.token_hex(3)
     
     fabric = Fabric.objects.create(fabric_name=f"Fabric_{unique_id}")
     color = Color.objects.create(color_name=f"Color_{unique_id}")
@@ -75,7 +82,7 @@ def create_test_variant_size(stock_quantity, base_price=Decimal('500.00')):
 
 def create_test_address(user):
     """Helper to create an Address for testing"""
-    unique_id = uuid.uuid4().hex[:6]
+    unique_id = secrets.token_hex(3)
     
     country = Country.objects.create(country_name=f"Country_{unique_id}")
     state = State.objects.create(
@@ -101,6 +108,17 @@ def create_test_address(user):
     return address
 
 
+@lru_cache(maxsize=64)
+def signature_for(razorpay_order_id, razorpay_payment_id):
+    """Helper to compute (and memoize) a valid Razorpay signature"""
+    message = f"{razorpay_order_id}|{razorpay_payment_id}"
+    return hmac.new(
+        PaymentService.RAZORPAY_KEY_SECRET.encode('utf-8'),
+        message.encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
 def create_test_tax_config():
     """Helper to create a TaxConfiguration for testing"""
     from datetime import date
@@ -115,39 +133,6 @@ def create_test_tax_config():
     return tax_config
 
 
-def cleanup_variant_size(variant_size):
-    """Helper to cleanup test data"""
-    product = variant_size.variant.product
-    fabric = variant_size.variant.fabric
-    color = variant_size.variant.color
-    pattern = variant_size.variant.pattern
-    sleeve = variant_size.variant.sleeve
-    pocket = variant_size.variant.pocket
-    size = variant_size.size
-    
-    product.delete()
-    fabric.delete()
-    color.delete()
-    pattern.delete()
-    sleeve.delete()
-    pocket.delete()
-    size.delete()
-
-
-def cleanup_address(address):
-    """Helper to cleanup address test data"""
-    postal_code = address.postal_code
-    city = postal_code.city
-    state = city.state
-    country = state.country
-    
-    address.delete()
-    postal_code.delete()
-    city.delete()
-    state.delete()
-    country.delete()
-
-
 class TestAdvancePaymentAmount(TestCase):
     """
     Property 18: Advance payment is 50% of order total
@@ -169,16 +154,16 @@ class TestAdvancePaymentAmount(TestCase):
         This tests the calculation logic directly without full order creation.
         """
         # Test the calculation logic directly
-        expected_advance = (order_total * Decimal('0.5')).quantize(Decimal('0.01'))
+        expected_advance = (order_total * HALF).quantize(TWO_PLACES)
         
         # Property: Advance payment should be approximately 50% (within 1 paisa due to rounding)
-        half_total = (order_total / 2).quantize(Decimal('0.01'))
+        half_total = (order_total / 2).quantize(TWO_PLACES)
         difference = abs(expected_advance - half_total)
-        assert difference <= Decimal('0.01'), \
+        assert difference <= TWO_PLACES, \
             f"Advance payment should be approximately 50% of {order_total}, difference: {difference}"
         
         # Property: Advance + Final should equal total
-        expected_final = (order_total - expected_advance).quantize(Decimal('0.01'))
+        expected_final = (order_total - expected_advance).quantize(TWO_PLACES)
         total_paid = expected_advance + expected_final
         
         assert total_paid == order_total, \
@@ -206,9 +191,6 @@ class TestPaymentVerification(TestCase):
         For any payment, signature verification should correctly validate
         authentic signatures and reject invalid ones.
         """
-        import hmac
-        import hashlib
-        
         # Create test order and payment IDs
         razorpay_order_id = f"order_{order_id_suffix}"
         razorpay_payment_id = f"pay_{payment_id_suffix}"
@@ -244,6 +226,16 @@ class TestPaymentVerification(TestCase):
         assert is_invalid is False, \
             "Invalid signature should fail verification"
 
+        # Property: Batch verification should agree with per-call verification
+        batch_results = PaymentService.verify_signatures_batch([
+            (razorpay_order_id, razorpay_payment_id, valid_signature),
+            (razorpay_order_id, razorpay_payment_id, invalid_signature),
+            (razorpay_order_id, razorpay_payment_id, None),
+        ])
+
+        assert batch_results == [True, False, False], \
+            f"Batch verification should return [True, False, False], got {batch_results}"
+
 
 class TestFinalPaymentAmount(TestCase):
     """
@@ -266,10 +258,10 @@ class TestFinalPaymentAmount(TestCase):
         This tests the calculation logic directly.
         """
         # Calculate advance payment (50%)
-        advance_amount = (order_total * Decimal('0.5')).quantize(Decimal('0.01'))
+        advance_amount = (order_total * HALF).quantize(TWO_PLACES)
         
         # Calculate final payment (remaining amount)
-        final_amount = (order_total - advance_amount).quantize(Decimal('0.01'))
+        final_amount = (order_total - advance_amount).quantize(TWO_PLACES)
         
         # Property: Final payment should be remaining amount
         assert final_amount == order_total - advance_amount, \
@@ -307,7 +299,7 @@ class TestPaymentAtomicity(TestCase):
         For any payment verification, payment and order updates should be atomic.
         """
         # Create test user
-        unique_id = uuid.uuid4().hex[:8]
+        unique_id = secrets.token_hex(4)
         user = User.objects.create_user(
             username=f'testuser_{unique_id}',
             email=f'test_{unique_id}@example.com',
@@ -316,7 +308,7 @@ class TestPaymentAtomicity(TestCase):
         )
         
         # Create tax configuration
-        tax_config = create_test_tax_config()
+        create_test_tax_config()
         
         # Create address
         address = create_test_address(user)
@@ -327,105 +319,99 @@ class TestPaymentAtomicity(TestCase):
             base_price=base_price
         )
         
-        try:
-            # Add to cart and create order
-            CartService.add_to_cart(user, variant_size.id, quantity)
-            cart = Cart.objects.get(user=user, status='active')
-            
-            result = OrderService.create_order_from_cart(
-                user,
-                cart.id,
-                address.id
-            )
-            order = result['order']
-            
-            # Mock Razorpay client
-            with patch.object(PaymentService, '_get_razorpay_client') as mock_client:
-                mock_razorpay = MagicMock()
-                mock_razorpay.order.create.return_value = {
-                    'id': f'order_{uuid.uuid4().hex[:10]}',
+        # Add to cart and create order
+        CartService.add_to_cart(user, variant_size.id, quantity)
+        cart = Cart.objects.get(user=user, status='active')
+        
+        result = OrderService.create_order_from_cart(
+            user,
+            cart.id,
+            address.id
+        )
+        order = result['order']
+        
+        # Derive Razorpay IDs from the example so repeated examples (e.g. while
+        # Hypothesis shrinks) reuse the memoized signature
+        example_key = hash((quantity, base_price)) & 0xffffffff
+        razorpay_order_id = f'order_{example_key:08x}'
+        razorpay_payment_id = f'pay_{example_key:08x}'
+        
+        # Stub Razorpay client
+        razorpay_stub = SimpleNamespace(
+            order=SimpleNamespace(
+                create=lambda **kwargs: {
+                    'id': razorpay_order_id,
                     'amount': 50000,
                     'currency': 'INR'
                 }
-                mock_client.return_value = mock_razorpay
-                
-                # Create advance payment
-                payment_result = PaymentService.create_razorpay_order(
-                    order.id,
-                    'advance',
-                    'upi'
-                )
-                payment = payment_result['payment']
-                
-                # Generate valid signature
-                import hmac
-                import hashlib
-                razorpay_payment_id = f'pay_{uuid.uuid4().hex[:10]}'
-                message = f"{payment.razorpay_order_id}|{razorpay_payment_id}"
-                valid_signature = hmac.new(
-                    PaymentService.RAZORPAY_KEY_SECRET.encode('utf-8'),
-                    message.encode('utf-8'),
-                    hashlib.sha256
-                ).hexdigest()
-                
-                # Process successful payment
-                success_result = PaymentService.process_successful_payment(
-                    payment.id,
-                    razorpay_payment_id,
-                    valid_signature
-                )
-                
-                updated_payment = success_result['payment']
-                updated_order = success_result['order']
-                
-                # Property: Payment status should be updated to 'success'
-                assert updated_payment.payment_status == 'success', \
-                    f"Payment status should be 'success', got {updated_payment.payment_status}"
-                
-                # Property: Order status should be updated to 'confirmed' for advance payment
-                assert updated_order.status == 'confirmed', \
-                    f"Order status should be 'confirmed' after advance payment, " \
-                    f"got {updated_order.status}"
-                
-                # Property: Payment should have razorpay_payment_id
-                assert updated_payment.razorpay_payment_id == razorpay_payment_id, \
-                    "Payment should have razorpay_payment_id set"
-                
-                # Property: Payment should have paid_at timestamp
-                assert updated_payment.paid_at is not None, \
-                    "Payment should have paid_at timestamp"
-                
-                # Test atomicity with invalid signature
-                payment_result2 = PaymentService.create_razorpay_order(
-                    order.id,
-                    'final',
-                    'upi'
+            ),
+            payment=SimpleNamespace(
+                fetch=lambda payment_id: {'id': payment_id, 'method': 'upi'}
+            )
+        )
+        
+        with patch.object(PaymentService, '_get_razorpay_client', return_value=razorpay_stub):
+            # Create advance payment
+            payment_result = PaymentService.create_razorpay_order(
+                order.id,
+                'advance',
+                'upi'
+            )
+            payment = payment_result['payment']
+            
+            # Generate valid signature
+            valid_signature = signature_for(
+                payment.razorpay_order_id,
+                razorpay_payment_id
+            )
+            
+            # Process successful payment
+            success_result = PaymentService.process_successful_payment(
+                payment.id,
+                razorpay_payment_id,
+                valid_signature
+            )
+            
+            updated_payment = success_result['payment']
+            updated_order = success_result['order']
+            
+            # Property: Payment status should be updated to 'success'
+            assert updated_payment.payment_status == 'success', \
+                f"Payment status should be 'success', got {updated_payment.payment_status}"
+            
+            # Property: Order status should be updated to 'confirmed' for advance payment
+            assert updated_order.status == 'confirmed', \
+                f"Order status should be 'confirmed' after advance payment, " \
+                f"got {updated_order.status}"
+            
+            # Property: Payment should have razorpay_payment_id
+            assert updated_payment.razorpay_payment_id == razorpay_payment_id, \
+                "Payment should have razorpay_payment_id set"
+            
+            # Property: Payment should have paid_at timestamp
+            assert updated_payment.paid_at is not None, \
+                "Payment should have paid_at timestamp"
+            
+            # Test atomicity with invalid signature
+            payment_result2 = PaymentService.create_razorpay_order(
+                order.id,
+                'final',
+                'upi'
+            )
+            payment2 = payment_result2['payment']
+            
+            # Try to process with invalid signature
+            invalid_signature = valid_signature[:-4] + "0000"
+            
+            with self.assertRaises(ValidationError):
+                PaymentService.process_successful_payment(
+                    payment2.id,
+                    f'pay_{secrets.token_hex(5)}',
+                    invalid_signature
                 )
-                payment2 = payment_result2['payment']
-                
-                # Try to process with invalid signature
-                invalid_signature = valid_signature[:-4] + "0000"
-                
-                with self.assertRaises(ValidationError):
-                    PaymentService.process_successful_payment(
-                        payment2.id,
-                        f'pay_{uuid.uuid4().hex[:10]}',
-                        invalid_signature
-                    )
-                
-                # Property: Payment status should remain 'initiated' after failed verification
-                payment2.refresh_from_db()
-                assert payment2.payment_status == 'initiated', \
-                    f"Payment status should remain 'initiated' after failed verification, " \
-                    f"got {payment2.payment_status}"
-                
-        finally:
-            # Cleanup - delete in correct order to avoid foreign key issues
-            Payment.objects.filter(order=order).delete()
-            OrderItem.objects.filter(order=order).delete()
-            order.delete()
-            Cart.objects.filter(user=user).delete()
-            user.delete()
-            cleanup_address(address)
-            cleanup_variant_size(variant_size)
-            tax_config.delete()
+            
+            # Property: Payment status should remain 'initiated' after failed verification
+            payment2.refresh_from_db()
+            assert payment2.payment_status == 'initiated', \
+                f"Payment status should remain 'initiated' after failed verification, " \
+                f"got {payment2.payment_status}"
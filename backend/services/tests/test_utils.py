@@ -9,6 +9,7 @@ from django.test import TestCase
 from services.utils import (
     generate_sku,
     calculate_price_with_markup,
+    calculate_prices_with_markup,
     calculate_tax,
     calculate_total_with_tax,
 )
@@ -92,6 +93,14 @@ class TestPriceCalculation(TestCase):
         # 99.99 * 1.10 = 109.989, should round to 109.99
         self.assertEqual(result, Decimal('109.99'))
     
+    def test_price_rounding_ties_to_even(self):
+        """Test that exact half-paisa prices round to the even paisa"""
+        base_price = Decimal('0.10')
+        markup = Decimal('25.00')
+        result = calculate_price_with_markup(base_price, markup)
+        # 0.10 * 1.25 = 0.125, banker's rounding gives 0.12
+        self.assertEqual(result, Decimal('0.12'))
+    
     def test_negative_base_price_raises_error(self):
         """Test that negative base price raises ValueError"""
         with self.assertRaises(ValueError) as context:
@@ -105,6 +114,42 @@ class TestPriceCalculation(TestCase):
         self.assertIn("Markup percentage cannot be negative", str(context.exception))
 
 
+class TestBulkPriceCalculation(TestCase):
+    """Test cases for bulk price calculation with markup"""
+    
+    def test_bulk_prices_match_single_calculation(self):
+        """Test that bulk results match calculate_price_with_markup per item"""
+        items = [
+            (Decimal('100.00'), Decimal('10.00')),
+            (Decimal('99.99'), Decimal('10.00')),
+            (Decimal('200.00'), Decimal('25.00')),
+            (Decimal('0.10'), Decimal('25.00')),
+            (Decimal('500.00'), Decimal('0.00')),
+        ]
+        result = calculate_prices_with_markup(items)
+        expected = [calculate_price_with_markup(b, m) for b, m in items]
+        self.assertEqual(result, expected)
+    
+    def test_bulk_prices_empty_input(self):
+        """Test that an empty batch returns an empty list"""
+        self.assertEqual(calculate_prices_with_markup([]), [])
+    
+    def test_bulk_negative_base_price_raises_error(self):
+        """Test that a negative base price in the batch raises ValueError"""
+        with self.assertRaises(ValueError) as context:
+            calculate_prices_with_markup([
+                (Decimal('100.00'), Decimal('10.00')),
+                (Decimal('-1.00'), Decimal('10.00')),
+            ])
+        self.assertIn("Base price cannot be negative", str(context.exception))
+    
+    def test_bulk_negative_markup_raises_error(self):
+        """Test that a negative markup in the batch raises ValueError"""
+        with self.assertRaises(ValueError) as context:
+            calculate_prices_with_markup([(Decimal('100.00'), Decimal('-10.00'))])
+        self.assertIn("Markup percentage cannot be negative", str(context.exception))
+
+
 class TestTaxCalculation(TestCase):
     """Test cases for tax calculation"""
     
@@ -137,6 +182,14 @@ class TestTaxCalculation(TestCase):
         # 99.99 * 0.18 = 17.9982, should round to 18.00
         self.assertEqual(result, Decimal('18.00'))
     
+    def test_tax_rounding_ties_to_even(self):
+        """Test that exact half-paisa tax amounts round to the even paisa"""
+        amount = Decimal('0.50')
+        tax_rate = Decimal('5.00')
+        result = calculate_tax(amount, tax_rate)
+        # 0.50 * 0.05 = 0.025, banker's rounding gives 0.02
+        self.assertEqual(result, Decimal('0.02'))
+    
     def test_tax_on_small_amount(self):
         """Test tax calculation on small amounts"""
         amount = Decimal('10.00')
@@ -155,6 +208,12 @@ class TestTaxCalculation(TestCase):
         with self.assertRaises(ValueError) as context:
             calculate_tax(Decimal('1000.00'), Decimal('-18.00'))
         self.assertIn("Tax percentage cannot be negative", str(context.exception))
+    
+    def test_float_tax_rate_raises_error(self):
+        """Test that a float rate is rejected even after the same Decimal rate"""
+        calculate_tax(Decimal('1000.00'), Decimal('18'))
+        with self.assertRaises(TypeError):
+            calculate_tax(Decimal('1000.00'), 18.0)
 
 
 class TestTotalWithTaxCalculation(TestCase):
@@ -186,3 +245,9 @@ class TestTotalWithTaxCalculation(TestCase):
         
         self.assertEqual(tax, Decimal('12.50'))
         self.assertEqual(total, Decimal('112.49'))
+    
+    def test_total_with_negative_subtotal_raises_error(self):
+        """Test that negative subtotal raises ValueError"""
+        with self.assertRaises(ValueError) as context:
+            calculate_total_with_tax(Decimal('-500.00'), Decimal('18.00'))
+        self.assertIn("Amount cannot be negative", str(context.exception))
@@ -7,12 +7,17 @@ Common utility functions for SKU generation, price calculation, and tax calculat
 import uuid
 import logging
 from decimal import Decimal
-from typing import Optional
+from typing import Iterable, List, Optional, Tuple
 from datetime import datetime
 
 
 logger = logging.getLogger('services.utils')
 
+# Decimal constants shared by the price and tax helpers
+_TWO_PLACES = Decimal('0.01')
+_ONE = Decimal('1')
+_HUNDRED = Decimal('100')
+
 
 def generate_sku(prefix: str = "SKU") -> str:
     """
@@ -35,7 +40,7 @@ def generate_sku(prefix: str = "SKU") -> str:
     unique_id = uuid.uuid4().hex[:8].upper()
     sku = f"{prefix}-{timestamp}-{unique_id}"
     
-    logger.debug(f"Generated SKU: {sku}")
+    logger.debug("Generated SKU: %s", sku)
     return sku
 
 
@@ -68,20 +73,64 @@ def calculate_price_with_markup(
     if markup_percentage < 0:
         raise ValueError("Markup percentage cannot be negative")
     
-    markup_multiplier = Decimal('1') + (markup_percentage / Decimal('100'))
+    markup_multiplier = _ONE + (markup_percentage / _HUNDRED)
     final_price = base_price * markup_multiplier
     
     # Round to 2 decimal places
-    final_price = final_price.quantize(Decimal('0.01'))
+    final_price = final_price.quantize(_TWO_PLACES)
     
     logger.debug(
-        f"Calculated price: base={base_price}, markup={markup_percentage}%, "
-        f"final={final_price}"
+        "Calculated price: base=%s, markup=%s%%, final=%s",
+        base_price, markup_percentage, final_price
     )
     
     return final_price
 
 
+def calculate_prices_with_markup(
+    items: Iterable[Tuple[Decimal, Decimal]]
+) -> List[Decimal]:
+    """
+    Calculate final prices for many (base_price, markup_percentage) pairs.
+    
+    Intended for bulk repricing. Sizes share a small set of markup
+    percentages, so each distinct markup multiplier is computed once and
+    reused across the batch. Results match calculate_price_with_markup.
+    
+    Args:
+        items: Iterable of (base_price, markup_percentage) tuples
+        
+    Returns:
+        List of final prices, rounded to 2 decimal places, in input order
+        
+    Example:
+        >>> calculate_prices_with_markup([
+        ...     (Decimal('100.00'), Decimal('10.00')),
+        ...     (Decimal('200.00'), Decimal('10.00')),
+        ... ])
+        [Decimal('110.00'), Decimal('220.00')]
+    """
+    multipliers = {}
+    prices = []
+    
+    for base_price, markup_percentage in items:
+        if base_price < 0:
+            raise ValueError("Base price cannot be negative")
+        
+        multiplier = multipliers.get(markup_percentage)
+        if multiplier is None:
+            if markup_percentage < 0:
+                raise ValueError("Markup percentage cannot be negative")
+            multiplier = _ONE + (markup_percentage / _HUNDRED)
+            multipliers[markup_percentage] = multiplier
+        
+        prices.append((base_price * multiplier).quantize(_TWO_PLACES))
+    
+    logger.debug("Calculated %s prices with markup", len(prices))
+    
+    return prices
+
+
 def calculate_tax(
     amount: Decimal,
     tax_percentage: Decimal
@@ -111,14 +160,14 @@ def calculate_tax(
     if tax_percentage < 0:
         raise ValueError("Tax percentage cannot be negative")
     
-    tax_amount = amount * (tax_percentage / Decimal('100'))
+    tax_amount = amount * (tax_percentage / _HUNDRED)
     
     # Round to 2 decimal places
-    tax_amount = tax_amount.quantize(Decimal('0.01'))
+    tax_amount = tax_amount.quantize(_TWO_PLACES)
     
     logger.debug(
-        f"Calculated tax: amount={amount}, tax_rate={tax_percentage}%, "
-        f"tax_amount={tax_amount}"
+        "Calculated tax: amount=%s, tax_rate=%s%%, tax_amount=%s",
+        amount, tax_percentage, tax_amount
     )
     
     return tax_amount
@@ -144,7 +193,18 @@ def calculate_total_with_tax(
         >>> tax, total = calculate_total_with_tax(subtotal, tax_rate)
         >>> print(f"Tax: {tax}, Total: {total}")  # Tax: 180.00, Total: 1180.00
     """
-    tax_amount = calculate_tax(subtotal, tax_percentage)
+    if subtotal < 0:
+        raise ValueError("Amount cannot be negative")
+    
+    if tax_percentage < 0:
+        raise ValueError("Tax percentage cannot be negative")
+    
+    tax_amount = (subtotal * (tax_percentage / _HUNDRED)).quantize(_TWO_PLACES)
     total_amount = subtotal + tax_amount
     
+    logger.debug(
+        "Calculated total: subtotal=%s, tax_rate=%s%%, tax_amount=%s, total=%s",
+        subtotal, tax_percentage, tax_amount, total_amount
+    )
+    
     return tax_amount, total_amount
@@ -4,16 +4,33 @@ Tests for logging configuration and middleware.
 Verifies that logging is properly configured and middleware functions correctly.
 """
 
+import io
+import json
 import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from unittest.mock import patch
 from django.test import TestCase, RequestFactory, override_settings
 from django.contrib.auth import get_user_model
 from django.db import connection
+from django.http import HttpResponse
 from django.test.utils import override_settings
 
 from utils.logging_middleware import (
     SlowQueryLoggingMiddleware,
     SecurityEventLoggingMiddleware
 )
+from utils.logging_formatters import JSONFormatter
+from utils import logging_queue
+from utils.logging_queue import (
+    BoundedQueueHandler,
+    BufferedRotatingFileHandler,
+    FlushingQueueListener,
+    install_queue_logging
+)
 
 User = get_user_model()
 
@@ -63,6 +80,7 @@ class SecurityEventLoggingMiddlewareTest(TestCase):
         self.factory = RequestFactory()
         self.middleware = SecurityEventLoggingMiddleware(lambda r: None)
         self.user = User.objects.create_user(
+            username='testuser',
             email='test@example.com',
             password='testpass123',
             full_name='Test User',
@@ -90,6 +108,27 @@ class SecurityEventLoggingMiddlewareTest(TestCase):
         
         ip = self.middleware._get_client_ip(request)
         self.assertEqual(ip, '10.0.0.1')
+    
+    def test_get_client_ip_cached_on_request(self):
+        """Test that the client IP is resolved once per request."""
+        request = self.factory.get('/')
+        request.META['HTTP_X_FORWARDED_FOR'] = ' 10.0.0.1 , 192.168.1.1'
+        
+        self.assertEqual(self.middleware._get_client_ip(request), '10.0.0.1')
+        
+        request.META['HTTP_X_FORWARDED_FOR'] = '10.0.0.2'
+        self.assertEqual(self.middleware._get_client_ip(request), '10.0.0.1')
+    
+    def test_unauthorized_response_logged(self):
+        """Test that 401 responses are logged as authentication failures."""
+        middleware = SecurityEventLoggingMiddleware(lambda r: HttpResponse(status=401))
+        request = self.factory.get('/api/orders/')
+        
+        with self.assertLogs('django.security', level='WARNING') as cm:
+            response = middleware(request)
+        
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Authentication failed: GET /api/orders/', cm.output[0])
 
 
 @override_settings(ENABLE_QUERY_LOGGING=True, SLOW_QUERY_THRESHOLD=0.0)
@@ -98,22 +137,236 @@ class SlowQueryLoggingMiddlewareTest(TestCase):
     
     def setUp(self):
         self.factory = RequestFactory()
-        self.middleware = SlowQueryLoggingMiddleware(lambda r: None)
+        self.middleware = SlowQueryLoggingMiddleware(self.get_response)
+    
+    def get_response(self, request):
+        """Run one query while the middleware is timing the request."""
+        request.wrappers_during_view = list(connection.execute_wrappers)
+        User.objects.count()
+        return HttpResponse()
     
     def test_middleware_initialization(self):
         """Test that middleware initializes correctly."""
         self.assertIsNotNone(self.middleware)
     
-    def test_process_request_clears_queries(self):
-        """Test that process_request clears query log."""
+    def test_query_wrapper_installed_for_request_only(self):
+        """Test that queries are timed only while the request is handled."""
         request = self.factory.get('/')
         
-        # Add some queries
-        connection.queries_log.clear()
+        response = self.middleware(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(request.wrappers_during_view), 1)
+        self.assertNotIn(request.wrappers_during_view[0], connection.execute_wrappers)
+    
+    def test_slow_queries_are_logged(self):
+        """Test that queries over the threshold are logged."""
+        request = self.factory.get('/products/')
+        
+        with self.assertLogs('django.db.backends', level='WARNING') as cm:
+            self.middleware(request)
+        
+        self.assertEqual(request.wrappers_during_view[0].count, 1)
+        self.assertIn('Slow queries detected on GET /products/', cm.output[0])
+        self.assertIn('Slow Query #1', cm.output[1])
+    
+    def test_disabled_logger_skips_query_timing(self):
+        """Test that no wrapper is installed when warnings would be dropped."""
+        request = self.factory.get('/')
+        
+        with patch.object(logging.getLogger('django.db.backends'), 'isEnabledFor', return_value=False):
+            self.middleware(request)
         
-        # Process request should not raise error
-        result = self.middleware.process_request(request)
-        self.assertIsNone(result)
+        self.assertEqual(request.wrappers_during_view, [])
+
+
+class RecordingHandler(logging.Handler):
+    """Handler that keeps emitted records in memory."""
+    
+    def __init__(self):
+        super().__init__()
+        self.records = []
+    
+    def emit(self, record):
+        self.records.append(record)
+
+
+class QueueLoggingTest(TestCase):
+    """Test queued logging setup."""
+    
+    def setUp(self):
+        self.logger = logging.getLogger('tests.queued')
+        self.logger.propagate = False
+        self.handler = RecordingHandler()
+        self.logger.addHandler(self.handler)
+    
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+        self.logger.setLevel(logging.NOTSET)
+        logging_queue._installed.clear()
+    
+    def test_records_reach_original_handlers(self):
+        """Test that queued records are delivered by the listener."""
+        listeners = install_queue_logging(['tests.queued'])
+        self.assertEqual(len(listeners), 1)
+        self.assertIsInstance(self.logger.handlers[0], BoundedQueueHandler)
+        
+        self.logger.warning("queued message")
+        listeners[0].stop()
+        
+        self.assertEqual(len(self.handler.records), 1)
+        self.assertEqual(self.handler.records[0].getMessage(), "queued message")
+    
+    def test_queue_handler_uses_lowest_handler_level(self):
+        """Test that records no target handler accepts are not queued."""
+        self.handler.setLevel(logging.WARNING)
+        error_handler = RecordingHandler()
+        error_handler.setLevel(logging.ERROR)
+        self.logger.addHandler(error_handler)
+        self.logger.setLevel(logging.DEBUG)
+        
+        listeners = install_queue_logging(['tests.queued'])
+        queue_handler = self.logger.handlers[0]
+        self.assertEqual(queue_handler.level, logging.WARNING)
+        
+        self.logger.debug("debug message")
+        self.assertTrue(queue_handler.queue.empty())
+        listeners[0].stop()
+    
+    def test_exception_reaches_json_formatter_as_field(self):
+        """Test that queued records keep exc_info for the target formatter."""
+        stream = io.StringIO()
+        json_handler = logging.StreamHandler(stream)
+        json_handler.setFormatter(JSONFormatter())
+        self.logger.removeHandler(self.handler)
+        self.logger.addHandler(json_handler)
+        
+        listeners = install_queue_logging(['tests.queued'])
+        try:
+            raise ValueError("bad signature")
+        except ValueError:
+            self.logger.exception("Verification failed for %s", 'order_1')
+        listeners[0].stop()
+        
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry['message'], 'Verification failed for order_1')
+        self.assertIn('ValueError: bad signature', entry['exception'])
+    
+    def test_install_is_idempotent(self):
+        """Test that an already queued logger is left untouched."""
+        listeners = install_queue_logging(['tests.queued'])
+        self.assertEqual(install_queue_logging(['tests.queued']), [])
+        self.assertEqual(len(self.logger.handlers), 1)
+        listeners[0].stop()
+    
+    def test_forked_child_starts_its_own_listener(self):
+        """Test that the after-fork hook gives the child a new queue and listener."""
+        parent_listener = install_queue_logging(['tests.queued'])[0]
+        queue_handler = self.logger.handlers[0]
+        parent_queue = queue_handler.queue
+        # A forked child inherits no listener thread
+        parent_listener.stop()
+        
+        logging_queue._restart_after_fork()
+        
+        _, _, child_listener = logging_queue._installed[0]
+        self.assertIsNot(child_listener, parent_listener)
+        self.assertIsNot(queue_handler.queue, parent_queue)
+        
+        self.logger.warning("from the child")
+        child_listener.stop()
+        
+        self.assertEqual(
+            [record.getMessage() for record in self.handler.records],
+            ["from the child"]
+        )
+    
+    @patch('utils.logging_queue.install_queue_logging')
+    def test_ready_skips_install_under_test_runner(self, mock_install):
+        """Test that no listener threads are started by the test command."""
+        from django.apps import apps
+        
+        with patch('sys.argv', ['manage.py', 'test']):
+            apps.get_app_config('users').ready()
+        mock_install.assert_not_called()
+        
+        with patch('sys.argv', ['manage.py', 'runserver']):
+            apps.get_app_config('users').ready()
+        mock_install.assert_called_once()
+    
+    def test_stop_with_full_queue_drains_and_joins(self):
+        """Test that stopping a listener whose queue is full waits for room."""
+        release = threading.Event()
+        
+        class BlockingHandler(RecordingHandler):
+            def emit(self, record):
+                release.wait(5)
+                super().emit(record)
+        
+        handler = BlockingHandler()
+        log_queue = queue.Queue(2)
+        listener = FlushingQueueListener(log_queue, handler)
+        listener.start()
+        
+        log_queue.put(logging.makeLogRecord({'msg': 'first'}))
+        while not log_queue.empty():
+            time.sleep(0.01)
+        log_queue.put(logging.makeLogRecord({'msg': 'second'}))
+        log_queue.put(logging.makeLogRecord({'msg': 'third'}))
+        self.assertTrue(log_queue.full())
+        
+        threading.Timer(0.1, release.set).start()
+        listener.stop()
+        
+        self.assertIsNone(listener._thread)
+        self.assertEqual([r.getMessage() for r in handler.records], ['first', 'second', 'third'])
+    
+    def test_full_queue_drops_records(self):
+        """Test that a full queue drops records instead of blocking."""
+        handler = BoundedQueueHandler(queue.Queue(1))
+        
+        handler.handle(logging.makeLogRecord({'msg': 'first'}))
+        handler.handle(logging.makeLogRecord({'msg': 'second'}))
+        
+        self.assertEqual(handler.dropped, 1)
+
+
+class BufferedRotatingFileHandlerTest(TestCase):
+    """Test the buffered file handler used behind queued loggers."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'test.log')
+        self.logger = logging.getLogger('tests.buffered')
+        self.logger.propagate = False
+        self.handler = BufferedRotatingFileHandler(self.path, maxBytes=200, backupCount=2)
+        self.logger.addHandler(self.handler)
+    
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+        self.handler.close()
+        self.tmpdir.cleanup()
+    
+    def test_listener_flushes_on_stop(self):
+        """Test that buffered records are written once the listener stops."""
+        listeners = install_queue_logging(['tests.buffered'])
+        
+        self.logger.warning("buffered message")
+        listeners[0].stop()
+        
+        with open(self.path) as log_file:
+            self.assertEqual(log_file.read(), "buffered message\n")
+    
+    def test_rollover_uses_tracked_size(self):
+        """Test that files rotate once the tracked size reaches maxBytes."""
+        for i in range(10):
+            self.logger.warning("message %02d %s", i, 'x' * 30)
+        self.handler.flush_buffer()
+        
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        for path in (self.path, self.path + '.1'):
+            self.assertLess(os.path.getsize(path), 200)
 
 
 class LoggingIntegrationTest(TestCase):
@@ -148,3 +401,28 @@ class LoggingIntegrationTest(TestCase):
         self.assertEqual(len(cm.output), 1)
         self.assertIn('PAYMENT_CREATED', cm.output[0])
         self.assertIn('PaymentID: 123', cm.output[0])
+
+
+class JSONFormatterTest(TestCase):
+    """Test the JSON log formatter."""
+    
+    def test_extra_fields_become_keys(self):
+        """Test that the message and extra fields are serialized."""
+        record = logging.makeLogRecord({
+            'name': 'django.security',
+            'levelno': logging.WARNING,
+            'levelname': 'WARNING',
+            'msg': 'Authentication failed: %s %s',
+            'args': ('GET', '/api/orders/'),
+            'event': 'auth_failed',
+            'ip': '10.0.0.1',
+        })
+        
+        entry = json.loads(JSONFormatter().format(record))
+        
+        self.assertEqual(entry['level'], 'WARNING')
+        self.assertEqual(entry['logger'], 'django.security')
+        self.assertEqual(entry['message'], 'Authentication failed: GET /api/orders/')
+        self.assertEqual(entry['event'], 'auth_failed')
+        self.assertEqual(entry['ip'], '10.0.0.1')
+        self.assertNotIn('args', entry)
@@ -0,0 +1,42 @@
+"""
+Logging Formatters
+
+Provides a JSON formatter for log files that are parsed by downstream
+tooling (security events, slow queries), so consumers read fields instead
+of splitting free-form text.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+
+# Attributes every LogRecord carries; anything else was passed via `extra`
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord('', logging.INFO, '', 0, '', None, None))
+) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format each record as a single-line JSON object.
+    
+    Standard fields (time, level, logger, message) are always present;
+    values passed through `extra=` are added as top-level keys.
+    """
+    
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        
+        return json.dumps(entry, default=str, separators=(',', ':'))
@@ -11,13 +11,38 @@ import logging
 import time
 from django.conf import settings
 from django.db import connection
-from django.utils.deprecation import MiddlewareMixin
 
 logger = logging.getLogger(__name__)
 slow_query_logger = logging.getLogger('django.db.backends')
 
 
-class SlowQueryLoggingMiddleware(MiddlewareMixin):
+class QueryStats:
+    """
+    Per-request query statistics collected by a database execute wrapper.
+    
+    Every query is timed as it executes; only queries exceeding the
+    threshold keep their SQL, so nothing depends on DEBUG query capture.
+    """
+    
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.count = 0
+        self.total_time = 0.0
+        self.slow_queries = []
+    
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total_time += duration
+            if duration >= self.threshold:
+                self.slow_queries.append((duration, sql))
+
+
+class SlowQueryLoggingMiddleware:
     """
     Middleware to log slow database queries.
     
@@ -25,65 +50,78 @@ class SlowQueryLoggingMiddleware(MiddlewareMixin):
     Only active when ENABLE_QUERY_LOGGING is True.
     """
     
-    def process_request(self, request):
-        """
-        Reset query tracking at the start of each request.
-        """
-        if settings.ENABLE_QUERY_LOGGING:
-            # Reset queries for this request
-            connection.queries_log.clear()
-        return None
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Middleware is instantiated once per process, so read settings once
+        self.enabled = bool(getattr(settings, 'ENABLE_QUERY_LOGGING', False))
+        self.threshold = float(getattr(settings, 'SLOW_QUERY_THRESHOLD', 1.0))
     
-    def process_response(self, request, response):
+    def __call__(self, request):
         """
-        Log slow queries after the response is generated.
-        """
-        if not settings.ENABLE_QUERY_LOGGING:
-            return response
+        Time the queries run while handling the request.
         
-        # Get all queries executed during this request
-        queries = connection.queries
-        
-        if not queries:
-            return response
+        Skipped entirely when the slow query logger would discard warnings,
+        so no per-query timing is paid for output nobody sees.
+        """
+        if not self.enabled or not slow_query_logger.isEnabledFor(logging.WARNING):
+            return self.get_response(request)
         
-        # Calculate total query time
-        total_time = sum(float(q.get('time', 0)) for q in queries)
+        stats = QueryStats(self.threshold)
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
         
-        # Log slow queries
-        slow_queries = []
-        for query in queries:
-            query_time = float(query.get('time', 0))
-            if query_time >= settings.SLOW_QUERY_THRESHOLD:
-                slow_queries.append({
-                    'sql': query.get('sql', ''),
-                    'time': query_time
-                })
+        if stats.count:
+            self._log_queries(request, stats)
         
-        if slow_queries:
+        return response
+    
+    def _log_queries(self, request, stats):
+        """
+        Log slow queries after the response is generated.
+        """
+        if stats.slow_queries:
             slow_query_logger.warning(
-                f"Slow queries detected on {request.method} {request.path} | "
-                f"Total queries: {len(queries)} | "
-                f"Total time: {total_time:.3f}s | "
-                f"Slow queries: {len(slow_queries)}"
+                "Slow queries detected on %s %s | Total queries: %d | "
+                "Total time: %.3fs | Slow queries: %d",
+                request.method, request.path, stats.count,
+                stats.total_time, len(stats.slow_queries),
+                extra={
+                    'event': 'slow_queries',
+                    'method': request.method,
+                    'path': request.path,
+                    'query_count': stats.count,
+                    'total_time': stats.total_time,
+                    'slow_query_count': len(stats.slow_queries),
+                }
             )
             
-            for idx, sq in enumerate(slow_queries, 1):
+            for idx, (query_time, sql) in enumerate(stats.slow_queries, 1):
                 slow_query_logger.warning(
-                    f"Slow Query #{idx} ({sq['time']:.3f}s): {sq['sql'][:500]}"
+                    "Slow Query #%d (%.3fs): %s", idx, query_time, sql[:500],
+                    extra={
+                        'event': 'slow_query',
+                        'path': request.path,
+                        'duration': query_time,
+                        'sql': sql[:500],
+                    }
                 )
         
         # Log if too many queries (N+1 problem indicator)
-        if len(queries) > 50:
+        if stats.count > 50:
             slow_query_logger.warning(
-                f"High query count on {request.method} {request.path}: "
-                f"{len(queries)} queries in {total_time:.3f}s"
+                "High query count on %s %s: %d queries in %.3fs",
+                request.method, request.path, stats.count, stats.total_time,
+                extra={
+                    'event': 'high_query_count',
+                    'method': request.method,
+                    'path': request.path,
+                    'query_count': stats.count,
+                    'total_time': stats.total_time,
+                }
             )
-        
-        return response
 
 
-class DetailedRequestLoggingMiddleware(MiddlewareMixin):
+class DetailedRequestLoggingMiddleware:
     """
     Middleware for detailed request/response logging.
     
@@ -92,17 +130,17 @@ class DetailedRequestLoggingMiddleware(MiddlewareMixin):
     """
     
     def __init__(self, get_response):
-        super().__init__(get_response)
+        self.get_response = get_response
         self.logger = logging.getLogger('apps.users')
         from decouple import config
         self.enabled = settings.DEBUG or config('DETAILED_REQUEST_LOGGING', default=False, cast=bool)
     
-    def process_request(self, request):
+    def __call__(self, request):
         """
-        Log detailed request information.
+        Log detailed request and response information.
         """
-        if not self.enabled:
-            return None
+        if not self.enabled or not self.logger.isEnabledFor(logging.DEBUG):
+            return self.get_response(request)
         
         # Log request details
         log_data = {
@@ -114,19 +152,13 @@ class DetailedRequestLoggingMiddleware(MiddlewareMixin):
         }
         
         # Log user info if authenticated
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            log_data['user'] = f"{request.user.email} ({request.user.user_type})"
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            log_data['user'] = f"{user.email} ({user.user_type})"
         
-        self.logger.debug(f"Request details: {log_data}")
+        self.logger.debug("Request details: %s", log_data)
         
-        return None
-    
-    def process_response(self, request, response):
-        """
-        Log detailed response information.
-        """
-        if not self.enabled:
-            return response
+        response = self.get_response(request)
         
         # Log response details
         log_data = {
@@ -136,12 +168,12 @@ class DetailedRequestLoggingMiddleware(MiddlewareMixin):
             'content_type': response.get('Content-Type', 'Unknown'),
         }
         
-        self.logger.debug(f"Response details: {log_data}")
+        self.logger.debug("Response details: %s", log_data)
         
         return response
 
 
-class SecurityEventLoggingMiddleware(MiddlewareMixin):
+class SecurityEventLoggingMiddleware:
     """
     Middleware to log security-related events.
     
@@ -153,31 +185,53 @@ class SecurityEventLoggingMiddleware(MiddlewareMixin):
     """
     
     def __init__(self, get_response):
-        super().__init__(get_response)
+        self.get_response = get_response
         self.logger = logging.getLogger('django.security')
     
-    def process_response(self, request, response):
+    def __call__(self, request):
         """
         Log security events based on response status.
         """
+        response = self.get_response(request)
+        
+        status_code = response.status_code
+        if status_code not in (401, 403) or not self.logger.isEnabledFor(logging.WARNING):
+            return response
+        
         # Log authentication failures (401)
-        if response.status_code == 401:
+        if status_code == 401:
+            ip = self._get_client_ip(request)
+            user_agent = request.META.get('HTTP_USER_AGENT', 'Unknown')
             self.logger.warning(
-                f"Authentication failed: {request.method} {request.path} | "
-                f"IP: {self._get_client_ip(request)} | "
-                f"User-Agent: {request.META.get('HTTP_USER_AGENT', 'Unknown')}"
+                "Authentication failed: %s %s | IP: %s | User-Agent: %s",
+                request.method, request.path, ip, user_agent,
+                extra={
+                    'event': 'auth_failed',
+                    'method': request.method,
+                    'path': request.path,
+                    'ip': ip,
+                    'user_agent': user_agent,
+                }
             )
         
         # Log permission denied (403)
-        elif response.status_code == 403:
+        else:
             user_info = 'Anonymous'
-            if hasattr(request, 'user') and request.user.is_authenticated:
-                user_info = f"{request.user.email} ({request.user.user_type})"
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                user_info = f"{user.email} ({user.user_type})"
             
+            ip = self._get_client_ip(request)
             self.logger.warning(
-                f"Permission denied: {request.method} {request.path} | "
-                f"User: {user_info} | "
-                f"IP: {self._get_client_ip(request)}"
+                "Permission denied: %s %s | User: %s | IP: %s",
+                request.method, request.path, user_info, ip,
+                extra={
+                    'event': 'permission_denied',
+                    'method': request.method,
+                    'path': request.path,
+                    'user': user_info,
+                    'ip': ip,
+                }
             )
         
         return response
@@ -188,10 +242,16 @@ class SecurityEventLoggingMiddleware(MiddlewareMixin):
         """
         # Log CSRF failures
         if exception.__class__.__name__ == 'PermissionDenied':
+            ip = self._get_client_ip(request)
             self.logger.warning(
-                f"Permission denied exception: {request.method} {request.path} | "
-                f"Exception: {str(exception)} | "
-                f"IP: {self._get_client_ip(request)}"
+                "Permission denied exception: %s %s | Exception: %s | IP: %s",
+                request.method, request.path, exception, ip,
+                extra={
+                    'event': 'permission_denied_exception',
+                    'method': request.method,
+                    'path': request.path,
+                    'ip': ip,
+                }
             )
         
         return None
@@ -199,10 +259,19 @@ class SecurityEventLoggingMiddleware(MiddlewareMixin):
     def _get_client_ip(self, request):
         """
         Get the client's IP address from the request.
+        
+        The result is cached on the request, since both the response and
+        exception hooks may log the same request.
         """
+        ip = getattr(request, '_client_ip', None)
+        if ip is not None:
+            return ip
+        
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
+            ip = x_forwarded_for.partition(',')[0].strip()
         else:
             ip = request.META.get('REMOTE_ADDR')
+        
+        request._client_ip = ip
         return ip
@@ -0,0 +1,232 @@
+"""
+Queued Logging
+
+Moves log handler I/O off the request thread. The handlers configured in
+settings.LOGGING for selected loggers are replaced by a QueueHandler, and a
+QueueListener thread owns the real file/stream handlers.
+"""
+
+import atexit
+import copy
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Iterable, List
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+    
+    When the queue is full (e.g. the disk behind the listener is stuck),
+    records are dropped and counted instead of back-pressuring requests.
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Queue a copy of the record with its arguments merged into the message.
+        
+        The stock QueueHandler formats the record here and folds any traceback
+        into the message. Records never leave the process, so exc_info is kept
+        and each target handler's own formatter renders it (e.g. as the JSON
+        formatter's exception field).
+        """
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that writes through a large buffer.
+    
+    The stock handler flushes after every record and, to decide on rollover,
+    stats the file, seeks to its end and formats the record a second time.
+    Here the file size is tracked in memory and flushing is left to
+    FlushingQueueListener, which flushes whenever its queue runs empty, so a
+    burst of records reaches disk in a few large writes.
+    
+    Only use it for loggers listed in QUEUED_LOGGERS; without a listener,
+    records stay buffered until the buffer fills or the handler is closed.
+    """
+    
+    buffer_size = 64 * 1024
+    
+    def _open(self):
+        stream = self._builtin_open(
+            self.baseFilename, self.mode, buffering=self.buffer_size,
+            encoding=self.encoding, errors=self.errors
+        )
+        stream.seek(0, os.SEEK_END)
+        self._written = stream.tell()
+        return stream
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            
+            # Size is tracked in characters, which is close enough for rotation
+            if self.maxBytes > 0 and self._written + len(msg) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            
+            self.stream.write(msg)
+            self._written += len(msg)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self) -> None:
+        """Deferred; the listener calls flush_buffer() once its queue is idle."""
+    
+    def flush_buffer(self) -> None:
+        """Write buffered records to disk."""
+        super().flush()
+
+
+class FlushingQueueListener(QueueListener):
+    """
+    QueueListener that flushes buffered handlers whenever its queue runs empty.
+    """
+    
+    # Seconds stop() waits for room in a full queue to post the sentinel
+    sentinel_timeout = 5.0
+    
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        if block and self.queue.empty():
+            self.flush_handlers()
+        return self.queue.get(block)
+    
+    def flush_handlers(self) -> None:
+        for handler in self.handlers:
+            flush_buffer = getattr(handler, 'flush_buffer', None)
+            if flush_buffer is not None:
+                flush_buffer()
+    
+    def enqueue_sentinel(self) -> None:
+        # The queue is bounded, so the stock put_nowait raises queue.Full when
+        # stop() runs during a burst; wait for the listener to make room
+        self.queue.put(self._sentinel, timeout=self.sentinel_timeout)
+    
+    def stop(self) -> None:
+        try:
+            super().stop()
+        except queue.Full:
+            # The listener has not drained anything for sentinel_timeout
+            # seconds (e.g. a stuck disk); leave it rather than hang exit
+            logging.getLogger(__name__).warning(
+                "Log queue listener did not stop; queued records may be lost"
+            )
+            return
+        self.flush_handlers()
+
+
+# Queued loggers in this process, as (queue handler, target handlers, listener)
+_installed = []
+
+
+def _stop_listener(listener: QueueListener) -> None:
+    """Flush and stop a listener unless it has already been stopped."""
+    if getattr(listener, '_thread', None) is not None:
+        listener.stop()
+
+
+def _start_listener(log_queue: queue.Queue, handlers: List[logging.Handler]) -> QueueListener:
+    """Start a listener draining log_queue into handlers and stop it at exit."""
+    listener = FlushingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _flush_before_fork() -> None:
+    """Write buffered records so a forked child does not write them again."""
+    for _, handlers, _ in _installed:
+        for handler in handlers:
+            flush_buffer = getattr(handler, 'flush_buffer', None)
+            if flush_buffer is not None:
+                flush_buffer()
+
+
+def _restart_after_fork() -> None:
+    """
+    Give a forked child its own queues and listener threads.
+    
+    Only the forking thread survives fork(), so a child (e.g. a gunicorn
+    worker started from a --preload parent) inherits the queue handlers but
+    no thread draining them. Records the parent had queued belong to the
+    parent and are left behind with the old queue.
+    """
+    for index, (queue_handler, handlers, listener) in enumerate(_installed):
+        # The inherited thread is not running here; don't stop it at exit
+        listener._thread = None
+        
+        log_queue = queue.Queue(queue_handler.queue.maxsize)
+        queue_handler.queue = log_queue
+        queue_handler.dropped = 0
+        _installed[index] = (queue_handler, handlers, _start_listener(log_queue, handlers))
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_flush_before_fork, after_in_child=_restart_after_fork)
+
+
+def install_queue_logging(
+    logger_names: Iterable[str],
+    maxsize: int = 10000
+) -> List[QueueListener]:
+    """
+    Route the given loggers through bounded queues drained by listener threads.
+    
+    Each logger gets its own queue and listener so records keep going only to
+    the handlers configured for that logger. Loggers that are already queued
+    or have no handlers are left untouched, so calling this twice is safe.
+    Processes forked afterwards start their own listeners.
+    
+    Args:
+        logger_names: Names of the loggers to route through a queue
+        maxsize: Maximum number of records buffered per logger
+    
+    Returns:
+        The listeners that were started
+    """
+    listeners = []
+    
+    for name in logger_names:
+        target = logging.getLogger(name)
+        handlers = list(target.handlers)
+        
+        if not handlers or any(isinstance(h, QueueHandler) for h in handlers):
+            continue
+        
+        log_queue = queue.Queue(maxsize)
+        for handler in handlers:
+            target.removeHandler(handler)
+        
+        # Records below every target handler's level would only be dropped by
+        # the listener, so filter them before they are formatted and queued
+        queue_handler = BoundedQueueHandler(log_queue)
+        queue_handler.setLevel(min(handler.level for handler in handlers))
+        target.addHandler(queue_handler)
+        
+        listener = _start_listener(log_queue, handlers)
+        _installed.append((queue_handler, handlers, listener))
+        listeners.append(listener)
+    
+    return listeners
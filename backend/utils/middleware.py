@@ -3,60 +3,65 @@ Security middleware for the application.
 """
 from django.conf import settings
 from django.http import HttpResponsePermanentRedirect
-from django.utils.deprecation import MiddlewareMixin
 
 
-class HTTPSRedirectMiddleware(MiddlewareMixin):
+# Load balancer health checks: never redirected and not rendered by browsers,
+# so they skip both middlewares. Checked with a single str.startswith call.
+HEALTH_CHECK_PREFIXES = ('/health/', '/api/health/')
+
+
+class HTTPSRedirectMiddleware:
     """
     Middleware to redirect all HTTP requests to HTTPS in production.
     Only active when DEBUG=False and ENFORCE_HTTPS=True.
     """
     
-    def process_request(self, request):
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = not settings.DEBUG and getattr(settings, 'ENFORCE_HTTPS', False)
+    
+    def __call__(self, request):
         """
         Redirect HTTP requests to HTTPS if not in debug mode.
         """
-        # Skip if in debug mode or HTTPS enforcement is disabled
-        if settings.DEBUG or not getattr(settings, 'ENFORCE_HTTPS', False):
-            return None
+        # Skip if already using HTTPS, or for health check endpoints
+        if (
+            not self.enabled
+            or request.is_secure()
+            or request.path.startswith(HEALTH_CHECK_PREFIXES)
+        ):
+            return self.get_response(request)
         
-        # Skip if already using HTTPS
-        if request.is_secure():
-            return None
-        
-        # Skip for health check endpoints
-        if request.path in ['/health/', '/api/health/']:
-            return None
-        
-        # Redirect to HTTPS
-        url = request.build_absolute_uri(request.get_full_path())
-        secure_url = url.replace('http://', 'https://', 1)
-        return HttpResponsePermanentRedirect(secure_url)
+        # Redirect to HTTPS on the same host and path
+        return HttpResponsePermanentRedirect(
+            f'https://{request.get_host()}{request.get_full_path()}'
+        )
 
 
-class SecurityHeadersMiddleware(MiddlewareMixin):
+class SecurityHeadersMiddleware:
     """
     Middleware to add security headers to all responses.
     """
     
-    def process_response(self, request, response):
-        """
-        Add security headers to response.
-        """
-        # Prevent clickjacking
-        if 'X-Frame-Options' not in response:
-            response['X-Frame-Options'] = 'DENY'
-        
+    # Headers sent on every response, regardless of environment
+    STATIC_HEADERS = (
         # Prevent MIME type sniffing
-        response['X-Content-Type-Options'] = 'nosniff'
-        
+        ('X-Content-Type-Options', 'nosniff'),
         # Enable XSS protection
-        response['X-XSS-Protection'] = '1; mode=block'
-        
+        ('X-XSS-Protection', '1; mode=block'),
         # Referrer policy
-        response['Referrer-Policy'] = 'strict-origin-when-cross-origin'
+        ('Referrer-Policy', 'strict-origin-when-cross-origin'),
+    )
+    
+    # Strict Transport Security (only over HTTPS)
+    HSTS_HEADER = 'max-age=31536000; includeSubDomains'
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Header values only depend on settings, so build them once per process
+        self.csp_header = None
         
-        # Content Security Policy (basic policy)
+        # Content Security Policy (basic policy), production only
         if not settings.DEBUG:
             csp_directives = [
                 "default-src 'self'",
@@ -67,10 +72,29 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
                 "connect-src 'self' https://api.razorpay.com",
                 "frame-src https://api.razorpay.com",
             ]
-            response['Content-Security-Policy'] = '; '.join(csp_directives)
+            self.csp_header = '; '.join(csp_directives)
+    
+    def __call__(self, request):
+        """
+        Add security headers to response.
+        """
+        response = self.get_response(request)
+        if request.path.startswith(HEALTH_CHECK_PREFIXES):
+            return response
+        
+        headers = response.headers
+        
+        # Prevent clickjacking
+        if 'X-Frame-Options' not in headers:
+            headers['X-Frame-Options'] = 'DENY'
+        
+        for name, value in self.STATIC_HEADERS:
+            headers[name] = value
         
-        # Strict Transport Security (only in production with HTTPS)
-        if not settings.DEBUG and request.is_secure():
-            response['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+        if self.csp_header is not None:
+            headers['Content-Security-Policy'] = self.csp_header
+            
+            if request.is_secure():
+                headers['Strict-Transport-Security'] = self.HSTS_HEADER
         
         return response
@@ -7,10 +7,106 @@ Uses Django's cache framework with configurable backends.
 
 from django.core.cache import cache
 from django.conf import settings
+from django.db.models import QuerySet
+from collections import OrderedDict
 from functools import wraps
 import hashlib
-import json
-from typing import Any, Callable, Optional
+import logging
+import pickle
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Keys fetched per SCAN step and removed per UNLINK during pattern invalidation
+SCAN_BATCH_SIZE = 1000
+
+# Seconds a value resolved through cache_query_result is reused from process
+# memory before the shared cache backend is consulted again; this also bounds
+# how long other processes can serve a value after it is invalidated
+LOCAL_CACHE_TTL = 5
+
+
+class LocalTTLCache:
+    """
+    Small thread-safe, bounded, in-process cache with per-entry expiry.
+    
+    Sits in front of the shared cache backend so repeated lookups of the
+    same key within a few seconds skip the network round-trip. Values are
+    stored pickled and every get returns a fresh copy, as a shared backend
+    would, so callers can mutate results without affecting each other.
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value) for a key, dropping it if expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+        return True, pickle.loads(value)
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ttl seconds, evicting the least recently used."""
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = LocalTTLCache()
+
+
+def _materialize(result: Any) -> Any:
+    """
+    Evaluate lazy QuerySets into lists before they are cached.
+    
+    Pickling a QuerySet also pickles its query state; caching the evaluated
+    rows is smaller, faster to load and never re-queries on access.
+    """
+    if isinstance(result, QuerySet):
+        return list(result)
+    return result
+
+
+def _stable_repr(value: Any) -> str:
+    """
+    repr() of a value with dict keys sorted at every level, so the same
+    filters produce the same cache key regardless of insertion order.
+    """
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+        return '{' + ', '.join(
+            f"{_stable_repr(k)}: {_stable_repr(v)}" for k, v in items
+        ) + '}'
+    if isinstance(value, list):
+        return '[' + ', '.join(_stable_repr(v) for v in value) + ']'
+    if isinstance(value, tuple):
+        if len(value) == 1:
+            return f'({_stable_repr(value[0])},)'
+        return '(' + ', '.join(_stable_repr(v) for v in value) + ')'
+    return repr(value)
 
 
 def generate_cache_key(prefix: str, *args, **kwargs) -> str:
@@ -25,23 +121,33 @@ def generate_cache_key(prefix: str, *args, **kwargs) -> str:
     Returns:
         Unique cache key string
     """
-    # Create a string representation of arguments
-    key_data = {
-        'args': str(args),
-        'kwargs': sorted(kwargs.items())
-    }
-    key_string = json.dumps(key_data, sort_keys=True)
+    # Hash the argument representations for consistent length; BLAKE2b is
+    # faster than MD5 and avoids building an intermediate JSON document
+    key_hash = hashlib.blake2b(digest_size=16)
+    key_hash.update(_stable_repr(args).encode())
     
-    # Hash the key string for consistent length
-    key_hash = hashlib.md5(key_string.encode()).hexdigest()
+    for name in sorted(kwargs):
+        key_hash.update(b'\x00')
+        key_hash.update(name.encode())
+        key_hash.update(b'=')
+        key_hash.update(_stable_repr(kwargs[name]).encode())
     
-    return f"{prefix}:{key_hash}"
+    return f"{prefix}:{key_hash.hexdigest()}"
 
 
 def cache_query_result(timeout: int = 300, key_prefix: Optional[str] = None):
     """
     Decorator to cache query results.
     
+    Results are also kept in process memory for up to LOCAL_CACHE_TTL
+    seconds, so repeated calls skip the shared cache round-trip.
+    Invalidation only clears that copy in the process that invalidates, so
+    other workers may keep returning the old result for up to
+    LOCAL_CACHE_TTL seconds after a write. Leave the decorator off queries
+    that must read their own writes across processes.
+    QuerySets are evaluated to lists before caching, so callers receive a
+    list rather than a QuerySet.
+    
     Args:
         timeout: Cache timeout in seconds (default: 5 minutes)
         key_prefix: Optional custom cache key prefix
@@ -50,26 +156,72 @@ def cache_query_result(timeout: int = 300, key_prefix: Optional[str] = None):
         @cache_query_result(timeout=600, key_prefix='product_list')
         def get_products(category=None):
             return Product.objects.filter(category=category)
+        
+        # Resolve several calls with a single cache.get_many()
+        shirts, trousers = get_products.get_many([('shirts',), ('trousers',)])
     """
     def decorator(func: Callable) -> Callable:
+        prefix = key_prefix or f"query:{func.__module__}.{func.__name__}"
+        
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             # Generate cache key
-            prefix = key_prefix or f"query:{func.__module__}.{func.__name__}"
             cache_key = generate_cache_key(prefix, *args, **kwargs)
             
-            # Try to get from cache
+            # Try the in-process cache first, then the shared cache
+            hit, result = _local_cache.get(cache_key)
+            if hit:
+                return result
+            
             result = cache.get(cache_key)
             
-            if result is not None:
-                return result
+            if result is None:
+                # Execute query and cache result
+                result = _materialize(func(*args, **kwargs))
+                cache.set(cache_key, result, timeout)
             
-            # Execute query and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, timeout)
+            _local_cache.set(cache_key, result, min(timeout, LOCAL_CACHE_TTL))
             
             return result
         
+        def get_many(calls: Iterable[Tuple]) -> List[Any]:
+            """
+            Resolve several calls with one shared-cache round-trip.
+            
+            Args:
+                calls: Iterable of positional-argument tuples, one per call
+            
+            Returns:
+                List of results in the same order as calls
+            """
+            calls = list(calls)
+            cache_keys = [generate_cache_key(prefix, *args) for args in calls]
+            args_by_key = dict(zip(cache_keys, calls))
+            resolved = {}
+            
+            for cache_key in args_by_key:
+                hit, result = _local_cache.get(cache_key)
+                if hit:
+                    resolved[cache_key] = result
+            
+            missing = [key for key in args_by_key if key not in resolved]
+            if missing:
+                resolved.update(cache.get_many(missing))
+            
+            fresh = {}
+            for cache_key in missing:
+                if resolved.get(cache_key) is None:
+                    fresh[cache_key] = _materialize(func(*args_by_key[cache_key]))
+            if fresh:
+                cache.set_many(fresh, timeout)
+                resolved.update(fresh)
+            
+            for cache_key in missing:
+                _local_cache.set(cache_key, resolved[cache_key], min(timeout, LOCAL_CACHE_TTL))
+            
+            return [resolved[cache_key] for cache_key in cache_keys]
+        
+        wrapper.get_many = get_many
         return wrapper
     return decorator
 
@@ -78,6 +230,9 @@ def invalidate_cache(key_prefix: str, *args, **kwargs) -> None:
     """
     Invalidate a specific cache entry.
     
+    The in-process copy is dropped only in this process; other workers see
+    the change once their copy expires (LOCAL_CACHE_TTL seconds).
+    
     Args:
         key_prefix: Cache key prefix to invalidate
         *args: Positional arguments used in original cache key
@@ -85,30 +240,115 @@ def invalidate_cache(key_prefix: str, *args, **kwargs) -> None:
     """
     cache_key = generate_cache_key(key_prefix, *args, **kwargs)
     cache.delete(cache_key)
+    _local_cache.delete(cache_key)
+
+
+def get_redis_client(backend=None):
+    """
+    Return the raw redis-py client behind a cache, if any.
+    
+    Supports both Django's built-in RedisCache and django-redis.
+    
+    Args:
+        backend: Cache backend to inspect (defaults to the default cache)
+    
+    Returns:
+        The redis-py client, or None for non-Redis backends
+    """
+    if backend is None:
+        backend = cache
+    for owner in (getattr(backend, '_cache', None), getattr(backend, 'client', None)):
+        if hasattr(owner, 'get_client'):
+            return owner.get_client(write=True)
+    return None
 
 
 def invalidate_cache_pattern(pattern: str) -> None:
     """
     Invalidate all cache entries matching a pattern.
     
-    Note: This requires Redis or Memcached backend with pattern support.
-    For simple cache backends, use specific invalidation.
+    On Redis, keys are found with incremental SCAN and removed with UNLINK
+    in batches, so the server is never blocked by a KEYS over the whole
+    keyspace. Other backends fall back to delete_pattern when available.
+    
+    As with invalidate_cache(), other processes may serve in-process copies
+    for up to LOCAL_CACHE_TTL seconds.
     
     Args:
         pattern: Cache key pattern (e.g., 'product:*')
     """
-    try:
-        # This works with Redis backend
-        cache.delete_pattern(pattern)
-    except AttributeError:
-        # Fallback for backends without pattern support
-        pass
+    # Local entries are short-lived; drop them all rather than pattern match
+    _local_cache.clear()
+    
+    redis_client = get_redis_client()
+    
+    if redis_client is not None:
+        batch = []
+        for key in redis_client.scan_iter(match=cache.make_key(pattern), count=SCAN_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= SCAN_BATCH_SIZE:
+                redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            redis_client.unlink(*batch)
+        return
+    
+    delete_pattern = getattr(cache, 'delete_pattern', None)
+    if delete_pattern is not None:
+        delete_pattern(pattern)
+    else:
+        logger.debug("Cache backend has no pattern support; skipped %s", pattern)
+
+
+def _get_or_set(cache_key: str, query_func: Callable, timeout: int) -> Any:
+    """Return the cached value for cache_key, computing and storing it on a miss."""
+    result = cache.get(cache_key)
+    
+    if result is None:
+        result = _materialize(query_func())
+        cache.set(cache_key, result, timeout)
+    
+    return result
+
+
+def get_or_set_cached(
+    cache_prefix: str,
+    query_func: Callable,
+    *args,
+    timeout: int = 300,
+    **kwargs
+) -> Any:
+    """
+    Get cached result or execute query and cache it.
+    
+    Usage:
+        products = get_or_set_cached(
+            'products',
+            lambda: Product.objects.filter(active=True),
+            timeout=600
+        )
+    
+    Args:
+        cache_prefix: Prefix for the cache key
+        query_func: Function that returns queryset
+        *args: Arguments for cache key generation
+        timeout: Cache timeout in seconds
+        **kwargs: Keyword arguments for cache key generation
+    
+    Returns:
+        Query result (from cache or fresh); QuerySets are returned as lists
+    """
+    cache_key = generate_cache_key(cache_prefix, *args, **kwargs)
+    return _get_or_set(cache_key, query_func, timeout)
 
 
 class CachedQuerySet:
     """
     Context manager for caching queryset results.
     
+    Kept for existing callers; new code should call get_or_set_cached(),
+    which does the same lookup without creating an object per use.
+    
     Usage:
         with CachedQuerySet('products', timeout=600) as cached:
             products = cached.get_or_set(
@@ -137,17 +377,10 @@ class CachedQuerySet:
             **kwargs: Keyword arguments for cache key generation
         
         Returns:
-            Query result (from cache or fresh)
+            Query result (from cache or fresh); QuerySets are returned as lists
         """
         self.cache_key = generate_cache_key(self.cache_prefix, *args, **kwargs)
-        
-        result = cache.get(self.cache_key)
-        
-        if result is None:
-            result = query_func()
-            cache.set(self.cache_key, result, self.timeout)
-        
-        return result
+        return _get_or_set(self.cache_key, query_func, self.timeout)
     
     def invalidate(self):
         """Invalidate the current cache entry."""
@@ -1,12 +1,83 @@
 """
 Rate limiting utilities for API endpoints.
+
+Requests are counted by django_ratelimit in the cache named by
+settings.RATELIMIT_USE_CACHE. Pointing that alias at RateLimitRedisCache
+counts each request with a single Lua script call.
 """
+import logging
+import threading
 from functools import wraps
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+from django_ratelimit import ALL
 from django_ratelimit.decorators import ratelimit
-from django_ratelimit.exceptions import Ratelimited
 from rest_framework.response import Response
 from rest_framework import status
 
+logger = logging.getLogger(__name__)
+
+# Increment a fixed-window counter and start its expiry in one atomic round trip
+WINDOW_COUNTER_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+class RateLimitRedisCache(RedisCache):
+    """
+    Redis cache backend for the rate limit alias.
+    
+    django_ratelimit counts a request with add(key, 1) and, when the window
+    key already exists, a follow-up incr(key). On the stock backend that is
+    SET NX, EXISTS and INCRBY. Here add(key, 1) runs WINDOW_COUNTER_SCRIPT
+    instead and hands the count to the incr() that follows on the same
+    thread, so each check is one round trip.
+    
+    Because add(key, 1) increments an existing key, only use this backend
+    for a cache alias dedicated to rate limit counters.
+    """
+    
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._window_counter = None
+        self._pending = threading.local()
+    
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        backend_timeout = self.get_backend_timeout(timeout)
+        if value != 1 or backend_timeout is None:
+            return super().add(key, value, timeout, version)
+        
+        key = self.make_and_validate_key(key, version=version)
+        client = self._cache.get_client(key, write=True)
+        # Registered once per backend; runs via EVALSHA on whichever client
+        # owns the key
+        if self._window_counter is None:
+            self._window_counter = client.register_script(WINDOW_COUNTER_SCRIPT)
+        
+        try:
+            count = self._window_counter(keys=[key], args=[backend_timeout], client=client)
+        except Exception as e:
+            # A None count makes django_ratelimit apply RATELIMIT_FAIL_OPEN
+            logger.warning("Rate limit counter unavailable: %s", e)
+            count = None
+        
+        if count == 1:
+            return True
+        self._pending.count = (key, count)
+        return False
+    
+    def incr(self, key, delta=1, version=None):
+        pending = getattr(self._pending, 'count', None)
+        if pending is not None:
+            self._pending.count = None
+            if delta == 1 and pending[0] == self.make_and_validate_key(key, version=version):
+                return pending[1]
+        return super().incr(key, delta, version)
+
 
 def api_ratelimit(key='ip', rate='100/h', method='ALL', block=True):
     """
@@ -24,9 +95,12 @@ def api_ratelimit(key='ip', rate='100/h', method='ALL', block=True):
         def my_view(request):
             ...
     """
+    # django_ratelimit spells "every method" as its ALL sentinel, not 'ALL'
+    if method == 'ALL':
+        method = ALL
+    
     def decorator(view_func):
         @wraps(view_func)
-        @ratelimit(key=key, rate=rate, method=method, block=block)
         def wrapped_view(request, *args, **kwargs):
             # Check if request was rate limited
             if getattr(request, 'limited', False):
@@ -42,7 +116,8 @@ def api_ratelimit(key='ip', rate='100/h', method='ALL', block=True):
                     status=status.HTTP_429_TOO_MANY_REQUESTS
                 )
             return view_func(request, *args, **kwargs)
-        return wrapped_view
+        
+        return ratelimit(key=key, rate=rate, method=method, block=block)(wrapped_view)
     return decorator
 
 
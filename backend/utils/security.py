@@ -2,6 +2,7 @@
 Security utilities for file upload validation and other security features.
 """
 import os
+import re
 from django.core.exceptions import ValidationError
 from django.conf import settings
 
@@ -38,6 +39,26 @@ ALLOWED_DOCUMENT_TYPES = {
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5 MB
 MAX_DOCUMENT_SIZE = 10 * 1024 * 1024  # 10 MB
 
+# Number of leading bytes read to sniff the file type
+FILE_HEAD_SIZE = 2048
+
+# Image types that still get a full PIL verify() pass instead of a header probe
+FULL_VERIFY_IMAGE_TYPES = {'image/gif', 'image/webp'}
+
+# Leading-byte signatures of common upload types, matched before asking libmagic.
+# Container formats (DOCX is a ZIP, DOC is OLE2) are left to libmagic, since
+# the container signature alone does not tell the document type.
+_MIME_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+)
+
+# Characters stripped from uploaded filenames (anything but word chars, whitespace, dots and dashes)
+_FILENAME_BAD = re.compile(r'[^\w\s.-]')
+
 
 def validate_file_size(file, max_size):
     """
@@ -80,7 +101,38 @@ def validate_file_extension(file, allowed_types):
         )
 
 
-def validate_file_mime_type(file, allowed_types):
+def _sniff_mime_type(file_head):
+    """
+    Detect the MIME type of common upload types from their leading bytes.
+    
+    Args:
+        file_head: First bytes of the file
+        
+    Returns:
+        MIME type, or None if the signature is not one of the known ones
+    """
+    for signature, mime in _MIME_SIGNATURES:
+        if file_head.startswith(signature):
+            return mime
+    
+    # WEBP is a RIFF container with the format tag at offset 8
+    if file_head[:4] == b'RIFF' and file_head[8:12] == b'WEBP':
+        return 'image/webp'
+    
+    return None
+
+
+def _read_file_head(file):
+    """
+    Read the leading bytes used for type sniffing and rewind the file.
+    """
+    file.seek(0)
+    file_head = file.read(FILE_HEAD_SIZE)
+    file.seek(0)
+    return file_head
+
+
+def validate_file_mime_type(file, allowed_types, file_head=None):
     """
     Validate file MIME type by reading file content (not just extension).
     This prevents users from uploading malicious files with fake extensions.
@@ -88,24 +140,31 @@ def validate_file_mime_type(file, allowed_types):
     Args:
         file: UploadedFile object
         allowed_types: Dictionary mapping MIME types to allowed extensions
+        file_head: Leading bytes of the file, if the caller already read them
+        
+    Returns:
+        Tuple of (detected MIME type, first bytes of the file)
         
     Raises:
         ValidationError: If MIME type doesn't match allowed types
     """
-    # Read first 2048 bytes to determine MIME type
-    file.seek(0)
-    file_head = file.read(2048)
-    file.seek(0)
+    # Read first bytes to determine MIME type
+    if file_head is None:
+        file_head = _read_file_head(file)
     
-    # Try to use python-magic if available, otherwise fallback to content_type
-    if MAGIC_AVAILABLE:
-        try:
-            mime = magic.from_buffer(file_head, mime=True)
-        except Exception:
+    # Common types are recognised from their signature without libmagic
+    mime = _sniff_mime_type(file_head)
+    
+    if mime is None:
+        # Try to use python-magic if available, otherwise fallback to content_type
+        if MAGIC_AVAILABLE:
+            try:
+                mime = magic.from_buffer(file_head, mime=True)
+            except Exception:
+                mime = file.content_type
+        else:
+            # Fallback to content_type if python-magic is not available
             mime = file.content_type
-    else:
-        # Fallback to content_type if python-magic is not available
-        mime = file.content_type
     
     if mime not in allowed_types:
         raise ValidationError(
@@ -119,6 +178,8 @@ def validate_file_mime_type(file, allowed_types):
         raise ValidationError(
             f'File extension "{ext}" does not match file type "{mime}"'
         )
+    
+    return mime, file_head
 
 
 def validate_image_file(file):
@@ -133,17 +194,61 @@ def validate_image_file(file):
     """
     validate_file_size(file, MAX_IMAGE_SIZE)
     validate_file_extension(file, ALLOWED_IMAGE_TYPES)
-    validate_file_mime_type(file, ALLOWED_IMAGE_TYPES)
+    mime, file_head = validate_file_mime_type(file, ALLOWED_IMAGE_TYPES)
     
-    # Additional validation: try to open with PIL to ensure it's a valid image
+    # Additional validation: make sure PIL can parse a real image header
     try:
-        from PIL import Image
+        if mime in FULL_VERIFY_IMAGE_TYPES:
+            _verify_image(file)
+        else:
+            _probe_image_header(file, file_head)
+    except ValidationError:
+        raise
+    except Exception as e:
+        raise ValidationError(f'Invalid image file: {str(e)}')
+
+
+def _verify_image(file):
+    """
+    Run PIL's full verify() pass over the whole file.
+    """
+    from PIL import Image
+    file.seek(0)
+    img = Image.open(file)
+    img.verify()
+    file.seek(0)
+
+
+def _probe_image_header(file, file_head):
+    """
+    Check that the file starts with a parseable image header.
+    
+    The bytes already read for MIME sniffing are fed to an incremental
+    parser, which identifies the format and dimensions without decoding
+    pixel data. When the header is larger than those bytes (e.g. a JPEG
+    with a big EXIF block), the file is opened lazily instead.
+    
+    Args:
+        file: UploadedFile object
+        file_head: Leading bytes of the file
+        
+    Raises:
+        ValidationError: If no image header could be parsed
+    """
+    from PIL import Image, ImageFile
+    parser = ImageFile.Parser()
+    parser.feed(file_head)
+    img = parser.image
+    
+    if img is None:
+        # Image.open only reads as far as the header
         file.seek(0)
         img = Image.open(file)
-        img.verify()
         file.seek(0)
-    except Exception as e:
-        raise ValidationError(f'Invalid image file: {str(e)}')
+    
+    width, height = img.size
+    if not width or not height:
+        raise ValidationError('Invalid image file: image has no dimensions')
 
 
 def validate_document_file(file):
@@ -175,8 +280,7 @@ def sanitize_filename(filename):
     filename = os.path.basename(filename)
     
     # Remove any non-alphanumeric characters except dots, dashes, and underscores
-    import re
-    filename = re.sub(r'[^\w\s.-]', '', filename)
+    filename = _FILENAME_BAD.sub('', filename)
     
     # Replace spaces with underscores
     filename = filename.replace(' ', '_')
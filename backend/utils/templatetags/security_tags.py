@@ -1,13 +1,100 @@
 """
 Template tags for security-related functionality.
 """
+import re
+import threading
 from django import template
 from django.utils.html import escape, format_html
 from django.utils.safestring import mark_safe
-import bleach
+from bleach.sanitizer import Cleaner
 
 register = template.Library()
 
+# Characters bleach.clean would change: markup and entity delimiters, plus
+# C0 control characters other than tab and newline (including \r)
+_NEEDS_SANITIZING = re.compile(r'[<>&\x00-\x08\x0b-\x1f]')
+
+# Tokens of markup bleach leaves untouched: text without entity delimiters or
+# control characters, <br>, and attribute-free inline or paragraph tags
+_SIMPLE_MARKUP = re.compile(r'</?(p|strong|em|u|code)>|<br>|[^<>&\x00-\x08\x0b-\x1f]+')
+
+# Characters escape_js rewrites
+_NEEDS_JS_ESCAPING = re.compile(r'[\\"\'\n\r\t<>]')
+
+# Tags and attributes sanitize_html keeps
+ALLOWED_TAGS = frozenset({
+    'p', 'br', 'strong', 'em', 'u', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'ul', 'ol', 'li', 'a', 'blockquote', 'code', 'pre'
+})
+
+ALLOWED_ATTRIBUTES = {
+    'a': ('href', 'title'),
+    'img': ('src', 'alt', 'title'),
+}
+
+# URL schemes that can run script or read local content when used in a link
+_DANGEROUS_SCHEMES = frozenset({'javascript', 'data', 'vbscript', 'file'})
+
+# First letters of the schemes above; a URL starting with any other printable
+# character cannot carry them
+_DANGEROUS_SCHEME_INITIALS = frozenset('jJdDvVfF')
+
+# Browsers drop tabs and newlines anywhere in a URL, and C0 control characters
+# and spaces around it, before reading the scheme
+_URL_IGNORED_CHARS = str.maketrans('', '', '\t\n\r')
+_C0_CONTROL_OR_SPACE = ''.join(map(chr, range(0x21)))
+
+_cleaners = threading.local()
+
+
+def _get_cleaner():
+    """
+    Return this thread's HTML cleaner, building it on first use.
+    
+    A Cleaner sets up its html5lib parser, walker and serializer once, so it
+    is reused across calls; it keeps parser state, so each thread gets its own.
+    """
+    cleaner = getattr(_cleaners, 'cleaner', None)
+    if cleaner is None:
+        cleaner = Cleaner(
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            strip=True
+        )
+        _cleaners.cleaner = cleaner
+    return cleaner
+
+
+def _is_simple_markup(value):
+    """
+    Return True if bleach would return value unchanged.
+    
+    Only text, <br> and properly nested <p>, <strong>, <em>, <u> and <code>
+    tags without attributes qualify, with paragraphs at the top level only;
+    html5lib closes, reopens or moves tags in any other arrangement.
+    """
+    open_tags = []
+    pos = 0
+    end = len(value)
+    
+    while pos < end:
+        match = _SIMPLE_MARKUP.match(value, pos)
+        if match is None:
+            return False
+        
+        tag = match.group(1)
+        if tag is not None:
+            if value[pos + 1] == '/':
+                if not open_tags or open_tags.pop() != tag:
+                    return False
+            elif tag == 'p' and open_tags:
+                return False
+            else:
+                open_tags.append(tag)
+        pos = match.end()
+    
+    return not open_tags
+
 
 @register.filter(name='sanitize_html')
 def sanitize_html(value):
@@ -20,24 +107,16 @@ def sanitize_html(value):
     if not value:
         return ''
     
-    # Allowed tags and attributes
-    allowed_tags = [
-        'p', 'br', 'strong', 'em', 'u', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-        'ul', 'ol', 'li', 'a', 'blockquote', 'code', 'pre'
-    ]
+    # Plain text comes out of bleach unchanged, so skip the HTML parser
+    if isinstance(value, str) and not _NEEDS_SANITIZING.search(value):
+        return mark_safe(value)
     
-    allowed_attributes = {
-        'a': ['href', 'title'],
-        'img': ['src', 'alt', 'title'],
-    }
+    # So does simple formatting markup, checked with a linear token scan
+    if isinstance(value, str) and _is_simple_markup(value):
+        return mark_safe(value)
     
     # Clean the HTML
-    cleaned = bleach.clean(
-        value,
-        tags=allowed_tags,
-        attributes=allowed_attributes,
-        strip=True
-    )
+    cleaned = _get_cleaner().clean(value)
     
     return mark_safe(cleaned)
 
@@ -52,8 +131,15 @@ def escape_js(value):
     if not value:
         return ''
     
-    # Escape special characters for JavaScript
+    # Escape special characters for JavaScript.
+    # Chained str.replace beats a single str.translate here: each replace is a
+    # C-level scan that returns the string untouched when nothing matches,
+    # while translate with multi-character replacements goes through a slow
+    # per-character mapping path. Backslash must stay first.
     value = str(value)
+    if not _NEEDS_JS_ESCAPING.search(value):
+        return value
+    
     value = value.replace('\\', '\\\\')
     value = value.replace('"', '\\"')
     value = value.replace("'", "\\'")
@@ -78,12 +164,18 @@ def safe_url(value):
     
     value = str(value).strip()
     
-    # Block dangerous URL schemes
-    dangerous_schemes = ['javascript:', 'data:', 'vbscript:', 'file:']
-    value_lower = value.lower()
+    first = value[:1]
+    if first >= ' ' and first not in _DANGEROUS_SCHEME_INITIALS:
+        return value
+    
+    # Block dangerous URL schemes; only the text before the first colon can
+    # name one, so the rest of the URL is never examined
+    colon = value.find(':')
+    if colon == -1:
+        return value
     
-    for scheme in dangerous_schemes:
-        if value_lower.startswith(scheme):
-            return ''
+    scheme = value[:colon].translate(_URL_IGNORED_CHARS).strip(_C0_CONTROL_OR_SPACE)
+    if scheme.lower() in _DANGEROUS_SCHEMES:
+        return ''
     
     return value
@@ -0,0 +1,166 @@
+"""
+Tests for query caching utilities.
+"""
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from utils.query_cache import (
+    CachedQuerySet,
+    get_or_set_cached,
+    LocalTTLCache,
+    cache_query_result,
+    invalidate_cache,
+    invalidate_cache_pattern,
+    _local_cache,
+)
+
+
+class LocalTTLCacheTests(TestCase):
+    """Test the in-process TTL cache."""
+    
+    def test_get_returns_stored_value(self):
+        """Test that a stored value is returned before it expires."""
+        local = LocalTTLCache()
+        local.set('key', [1, 2], ttl=60)
+        self.assertEqual(local.get('key'), (True, [1, 2]))
+    
+    def test_get_returns_independent_copies(self):
+        """Test that mutating a returned value does not change the cached one."""
+        local = LocalTTLCache()
+        local.set('key', [1, 2], ttl=60)
+        
+        local.get('key')[1].append(3)
+        
+        self.assertEqual(local.get('key'), (True, [1, 2]))
+    
+    def test_expired_value_is_a_miss(self):
+        """Test that an expired value is not returned."""
+        local = LocalTTLCache()
+        with patch('utils.query_cache.time.monotonic', return_value=100.0):
+            local.set('key', 'value', ttl=5)
+        with patch('utils.query_cache.time.monotonic', return_value=105.0):
+            self.assertEqual(local.get('key'), (False, None))
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache stays within maxsize."""
+        local = LocalTTLCache(maxsize=2)
+        local.set('a', 1, ttl=60)
+        local.set('b', 2, ttl=60)
+        local.get('a')
+        local.set('c', 3, ttl=60)
+        
+        self.assertEqual(local.get('b'), (False, None))
+        self.assertEqual(local.get('a'), (True, 1))
+        self.assertEqual(local.get('c'), (True, 3))
+
+
+class CacheQueryResultTests(TestCase):
+    """Test the cache_query_result decorator."""
+    
+    def setUp(self):
+        cache.clear()
+        _local_cache.clear()
+        self.calls = 0
+        
+        @cache_query_result(timeout=60, key_prefix='test_query')
+        def get_items(category):
+            self.calls += 1
+            return [category, self.calls]
+        
+        self.get_items = get_items
+    
+    def tearDown(self):
+        cache.clear()
+        _local_cache.clear()
+    
+    def test_repeated_calls_skip_shared_cache(self):
+        """Test that a repeated call is served from process memory."""
+        self.assertEqual(self.get_items('shirts'), ['shirts', 1])
+        
+        with patch('utils.query_cache.cache.get') as mock_get:
+            self.assertEqual(self.get_items('shirts'), ['shirts', 1])
+            mock_get.assert_not_called()
+        
+        self.assertEqual(self.calls, 1)
+    
+    def test_invalidate_cache_drops_local_entry(self):
+        """Test that invalidation also clears the in-process entry."""
+        self.get_items('shirts')
+        invalidate_cache('test_query', 'shirts')
+        
+        self.assertEqual(self.get_items('shirts'), ['shirts', 2])
+    
+    def test_get_many_uses_single_shared_cache_lookup(self):
+        """Test that get_many resolves all calls with one get_many."""
+        self.get_items('shirts')
+        _local_cache.clear()
+        
+        with patch('utils.query_cache.cache.get_many', wraps=cache.get_many) as mock_get_many:
+            results = self.get_items.get_many([('shirts',), ('trousers',)])
+        
+        mock_get_many.assert_called_once()
+        self.assertEqual(results, [['shirts', 1], ['trousers', 2]])
+        
+        # Both results are now cached
+        self.assertEqual(self.get_items('trousers'), ['trousers', 2])
+        self.assertEqual(self.calls, 2)
+    
+    def test_querysets_are_cached_as_lists(self):
+        """Test that QuerySet results are evaluated before caching."""
+        @cache_query_result(timeout=60, key_prefix='test_users')
+        def get_users():
+            return get_user_model().objects.all()
+        
+        self.assertIsInstance(get_users(), list)
+        
+        with CachedQuerySet('test_users_cm', timeout=60) as cached:
+            result = cached.get_or_set(lambda: get_user_model().objects.all())
+        self.assertIsInstance(result, list)
+        
+        result = get_or_set_cached('test_users_fn', lambda: get_user_model().objects.all(), timeout=60)
+        self.assertIsInstance(result, list)
+    
+    def test_get_or_set_cached_reuses_value(self):
+        """Test that get_or_set_cached only runs the query on a miss."""
+        calls = []
+        
+        def query():
+            calls.append(1)
+            return ['shirt']
+        
+        self.assertEqual(get_or_set_cached('test_fn', query, 'shirts', timeout=60), ['shirt'])
+        self.assertEqual(get_or_set_cached('test_fn', query, 'shirts', timeout=60), ['shirt'])
+        self.assertEqual(len(calls), 1)
+
+
+class InvalidateCachePatternTests(TestCase):
+    """Test pattern-based cache invalidation."""
+    
+    def test_redis_keys_are_scanned_and_unlinked(self):
+        """Test that matching keys are found with SCAN and removed with UNLINK."""
+        redis_client = MagicMock()
+        redis_client.scan_iter.return_value = iter([b'k1', b'k2'])
+        
+        with patch('utils.query_cache.get_redis_client', return_value=redis_client):
+            invalidate_cache_pattern('query:*product*')
+        
+        match = redis_client.scan_iter.call_args.kwargs['match']
+        self.assertTrue(match.endswith('query:*product*'))
+        redis_client.unlink.assert_called_once_with(b'k1', b'k2')
+        redis_client.keys.assert_not_called()
+    
+    def test_unlink_is_batched(self):
+        """Test that large key sets are removed in batches."""
+        redis_client = MagicMock()
+        redis_client.scan_iter.return_value = iter([b'k1', b'k2', b'k3'])
+        
+        with patch('utils.query_cache.get_redis_client', return_value=redis_client), \
+                patch('utils.query_cache.SCAN_BATCH_SIZE', 2):
+            invalidate_cache_pattern('query:*')
+        
+        self.assertEqual(redis_client.unlink.call_count, 2)
+    
+    def test_non_redis_backend_does_not_raise(self):
+        """Test that backends without pattern support are skipped safely."""
+        invalidate_cache_pattern('query:*product*')
@@ -0,0 +1,126 @@
+"""
+Tests for rate limiting utilities.
+"""
+from unittest.mock import patch
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+
+from utils.rate_limiting import RateLimitRedisCache, api_ratelimit, get_user_or_ip
+
+
+class FakeCounterScript:
+    """In-memory stand-in for the registered Redis counter script."""
+    
+    def __init__(self):
+        self.counts = {}
+        self.error = None
+    
+    def __call__(self, keys, args, client):
+        if self.error is not None:
+            raise self.error
+        self.counts[keys[0]] = self.counts.get(keys[0], 0) + 1
+        return self.counts[keys[0]]
+
+
+class FakeRedisClient:
+    """Minimal redis-py client exposing register_script."""
+    
+    def __init__(self):
+        self.script = FakeCounterScript()
+        self.registrations = 0
+    
+    def register_script(self, source):
+        self.registrations += 1
+        return self.script
+
+
+class RateLimitTests(TestCase):
+    """Test the api_ratelimit decorator."""
+    
+    def setUp(self):
+        self.factory = RequestFactory()
+        caches['ratelimit'].clear()
+        
+        @api_ratelimit(key=get_user_or_ip, rate='2/m', method=['GET'], block=False)
+        def view(request):
+            return HttpResponse('ok')
+        
+        self.view = view
+    
+    def _get(self):
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        return self.view(request)
+    
+    def _use_redis(self):
+        """Serve the rate limit alias from a Redis backend on a fake client."""
+        backend = RateLimitRedisCache('redis://localhost:6379/0', {})
+        client = FakeRedisClient()
+        patcher = patch.object(backend._cache, 'get_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(caches.__setitem__, 'ratelimit', caches['ratelimit'])
+        caches['ratelimit'] = backend
+        return client
+    
+    def test_limit_exceeded_without_redis(self):
+        """Test that requests over the limit get a 429 on non-Redis caches."""
+        statuses = [self._get().status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+    
+    def test_limit_exceeded_with_redis_counter(self):
+        """Test that the Redis backend counts each request once."""
+        client = self._use_redis()
+        
+        statuses = [self._get().status_code for _ in range(3)]
+        
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(list(client.script.counts.values()), [3])
+        self.assertEqual(client.registrations, 1)
+    
+    def test_redis_counter_failure_follows_fail_open_setting(self):
+        """Test that an unavailable counter blocks unless RATELIMIT_FAIL_OPEN."""
+        client = self._use_redis()
+        client.script.error = ConnectionError('down')
+        
+        with self.assertLogs('utils.rate_limiting', 'WARNING'):
+            self.assertEqual(self._get().status_code, 429)
+        
+        with override_settings(RATELIMIT_FAIL_OPEN=True), self.assertLogs('utils.rate_limiting', 'WARNING'):
+            self.assertEqual(self._get().status_code, 200)
+    
+    def test_redis_script_registered_per_backend(self):
+        """Test that each backend registers the counter on its own client."""
+        first = self._use_redis()
+        self._get()
+        second = self._use_redis()
+        self._get()
+        
+        self.assertEqual((first.registrations, second.registrations), (1, 1))
+        self.assertEqual(list(second.script.counts.values()), [1])
+    
+    def test_all_methods_limited(self):
+        """Test that method='ALL' limits every HTTP method."""
+        @api_ratelimit(key='ip', rate='1/m', method='ALL', block=False)
+        def view(request):
+            return HttpResponse('ok')
+        
+        statuses = [view(self.factory.post('/')).status_code, view(self.factory.delete('/')).status_code]
+        self.assertEqual(statuses, [200, 429])
+    
+    def test_redis_ip_key_groups_ipv6_network(self):
+        """Test that IPv6 clients in one /64 share a counter on the Redis backend."""
+        @api_ratelimit(key='ip', rate='1/m', method='ALL', block=False)
+        def view(request):
+            return HttpResponse('ok')
+        
+        client = self._use_redis()
+        statuses = [
+            view(self.factory.get('/', REMOTE_ADDR=addr)).status_code
+            for addr in ('2001:db8::1', '2001:db8::2')
+        ]
+        
+        self.assertEqual(statuses, [200, 429])
+        self.assertEqual(len(client.script.counts), 1)
@@ -1,12 +1,19 @@
 """
 Tests for security utilities.
 """
-from django.test import TestCase
+import io
+from unittest.mock import patch
+from PIL import Image
+from django.test import TestCase, RequestFactory, override_settings
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from utils.middleware import HTTPSRedirectMiddleware, SecurityHeadersMiddleware
 from utils.security import (
     validate_file_size,
     validate_file_extension,
+    validate_file_mime_type,
+    validate_image_file,
     sanitize_filename,
     ALLOWED_IMAGE_TYPES,
     MAX_IMAGE_SIZE
@@ -54,6 +61,69 @@ class FileValidationTests(TestCase):
         with self.assertRaises(ValidationError):
             validate_file_extension(file, ALLOWED_IMAGE_TYPES)
     
+    def _image_bytes(self, image_format):
+        """Render a small solid-colour image in the given format."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 30), 'red').save(buffer, image_format)
+        return buffer.getvalue()
+    
+    def test_validate_image_file_valid_png(self):
+        """Test that a real PNG passes the header probe."""
+        file = SimpleUploadedFile("test.png", self._image_bytes('PNG'), content_type="image/png")
+        
+        try:
+            validate_image_file(file)
+        except ValidationError:
+            self.fail("validate_image_file raised ValidationError unexpectedly")
+        
+        # File is rewound for the storage backend
+        self.assertEqual(file.tell(), 0)
+    
+    def test_validate_image_file_valid_gif(self):
+        """Test that a real GIF passes the full verify pass."""
+        file = SimpleUploadedFile("test.gif", self._image_bytes('GIF'), content_type="image/gif")
+        
+        try:
+            validate_image_file(file)
+        except ValidationError:
+            self.fail("validate_image_file raised ValidationError unexpectedly")
+    
+    def test_validate_image_file_rejects_non_image(self):
+        """Test that non-image content with an image extension is rejected."""
+        file = SimpleUploadedFile("test.png", b"not an image at all", content_type="image/png")
+        
+        with self.assertRaises(ValidationError):
+            validate_image_file(file)
+    
+    def test_validate_file_mime_type_uses_signature(self):
+        """Test that known signatures win over the client-supplied content type."""
+        data = self._image_bytes('PNG')
+        file = SimpleUploadedFile("test.jpg", data, content_type="image/jpeg")
+        
+        with patch('utils.security.MAGIC_AVAILABLE', False):
+            with self.assertRaises(ValidationError):
+                validate_file_mime_type(file, ALLOWED_IMAGE_TYPES)
+            
+            file = SimpleUploadedFile("test.png", data, content_type="image/jpeg")
+            mime, file_head = validate_file_mime_type(file, ALLOWED_IMAGE_TYPES)
+        
+        self.assertEqual(mime, 'image/png')
+        self.assertEqual(file_head, data[:2048])
+    
+    def test_validate_file_mime_type_reuses_given_head(self):
+        """Test that a head buffer passed in is used instead of re-reading the file."""
+        data = self._image_bytes('PNG')
+        file = SimpleUploadedFile("test.png", data, content_type="image/png")
+        file_head = data[:2048]
+        
+        with patch('utils.security._read_file_head', side_effect=AssertionError('file was re-read')):
+            mime, returned_head = validate_file_mime_type(
+                file, ALLOWED_IMAGE_TYPES, file_head=file_head
+            )
+        
+        self.assertEqual(mime, 'image/png')
+        self.assertIs(returned_head, file_head)
+    
     def test_sanitize_filename_removes_path(self):
         """Test that path components are removed from filename."""
         filename = "../../etc/passwd.txt"
@@ -106,3 +176,43 @@ class SecurityHeadersTests(TestCase):
         
         self.assertIn('Referrer-Policy', response)
         self.assertEqual(response['Referrer-Policy'], 'strict-origin-when-cross-origin')
+    
+    def test_csp_header_present_outside_debug(self):
+        """Test that the precomputed CSP header is sent when DEBUG is off."""
+        response = self.client.get('/')
+        
+        self.assertIn('Content-Security-Policy', response)
+        self.assertTrue(response['Content-Security-Policy'].startswith("default-src 'self'"))
+    
+    def test_health_check_skips_security_headers(self):
+        """Test that health check responses are returned untouched."""
+        middleware = SecurityHeadersMiddleware(lambda request: HttpResponse('ok'))
+        
+        response = middleware(RequestFactory().get('/api/health/'))
+        
+        self.assertNotIn('X-Content-Type-Options', response)
+        self.assertNotIn('Content-Security-Policy', response)
+
+
+@override_settings(ENFORCE_HTTPS=True, ALLOWED_HOSTS=['shop.example.com', 'testserver'])
+class HTTPSRedirectTests(TestCase):
+    """Test HTTPS redirect middleware."""
+    
+    def setUp(self):
+        self.middleware = HTTPSRedirectMiddleware(lambda request: HttpResponse('ok'))
+        self.factory = RequestFactory()
+    
+    def test_http_request_redirected_to_https(self):
+        """Test that plain HTTP requests keep host, path and query."""
+        request = self.factory.get('/products/?page=2', HTTP_HOST='shop.example.com')
+        
+        response = self.middleware(request)
+        
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], 'https://shop.example.com/products/?page=2')
+    
+    def test_secure_request_not_redirected(self):
+        """Test that HTTPS requests pass through."""
+        response = self.middleware(self.factory.get('/products/', secure=True))
+        
+        self.assertEqual(response.status_code, 200)
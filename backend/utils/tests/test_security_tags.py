@@ -0,0 +1,113 @@
+"""
+Tests for security template tags.
+"""
+import threading
+from unittest.mock import patch
+from django.test import TestCase
+
+from utils.templatetags.security_tags import (
+    _get_cleaner,
+    escape_js,
+    safe_url,
+    sanitize_html,
+)
+
+
+class EscapeJSTests(TestCase):
+    """Test the escape_js filter."""
+    
+    def test_empty_value(self):
+        """Test that empty values render as an empty string."""
+        self.assertEqual(escape_js(''), '')
+        self.assertEqual(escape_js(None), '')
+    
+    def test_quotes_and_control_characters_escaped(self):
+        """Test that quotes, backslashes and whitespace escapes are escaped."""
+        self.assertEqual(
+            escape_js('He said "it\'s\\fine"\n\t\r'),
+            'He said \\"it\\\'s\\\\fine\\"\\n\\t\\r'
+        )
+    
+    def test_script_tags_cannot_close_block(self):
+        """Test that angle brackets are hex-escaped."""
+        self.assertEqual(escape_js('</script>'), '\\x3C/script\\x3E')
+    
+    def test_plain_text_returned_unchanged(self):
+        """Test that text without special characters comes back as is."""
+        for value in ('Blue cotton shirt', 'कुर्ता सूती', 'Café crème'):
+            self.assertEqual(escape_js(value), value)
+    
+    def test_non_string_values(self):
+        """Test that non-string values are converted first."""
+        self.assertEqual(escape_js(42), '42')
+
+
+class SanitizeHTMLTests(TestCase):
+    """Test the sanitize_html filter."""
+    
+    def test_plain_text_returned_unchanged(self):
+        """Test that text without markup skips sanitizing and is marked safe."""
+        value = 'Soft cotton kurta, "machine washable".\nSizes S-XL'
+        
+        result = sanitize_html(value)
+        
+        self.assertEqual(result, value)
+        self.assertTrue(hasattr(result, '__html__'))
+    
+    def test_simple_markup_returned_unchanged(self):
+        """Test that nested formatting tags skip sanitizing."""
+        value = '<p>Soft <strong>cotton <em>kurta</em></strong></p><p>Sizes S-XL<br>Machine wash</p>'
+        
+        with patch('utils.templatetags.security_tags._get_cleaner') as get_cleaner:
+            result = sanitize_html(value)
+        
+        self.assertEqual(result, value)
+        get_cleaner.assert_not_called()
+    
+    def test_unbalanced_markup_still_sanitized(self):
+        """Test that markup html5lib would repair still goes through bleach."""
+        self.assertEqual(sanitize_html('<strong>bold'), '<strong>bold</strong>')
+        self.assertEqual(sanitize_html('</p>stray'), '<p></p>stray')
+        self.assertEqual(sanitize_html('<p>a<p>b'), '<p>a</p><p>b</p>')
+    
+    def test_disallowed_tags_stripped(self):
+        """Test that script tags are removed and allowed tags kept."""
+        result = sanitize_html('<p>Hello <script>alert(1)</script><strong>world</strong></p>')
+        
+        self.assertNotIn('<script>', result)
+        self.assertIn('<strong>world</strong>', result)
+    
+    def test_control_characters_still_sanitized(self):
+        """Test that text needing normalisation still goes through bleach."""
+        self.assertEqual(sanitize_html('line\r\nbreak & more'), 'line\nbreak &amp; more')
+    
+    def test_cleaner_reused_per_thread(self):
+        """Test that each thread builds its cleaner once."""
+        self.assertIs(_get_cleaner(), _get_cleaner())
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(_get_cleaner()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], _get_cleaner())
+
+
+class SafeURLTests(TestCase):
+    """Test the safe_url filter."""
+    
+    def test_safe_urls_kept(self):
+        """Test that http(s), relative and mailto URLs pass through stripped."""
+        self.assertEqual(safe_url(' https://example.com/shirts?page=2 '), 'https://example.com/shirts?page=2')
+        self.assertEqual(safe_url('/products/12/'), '/products/12/')
+        self.assertEqual(safe_url('mailto:sales@example.com'), 'mailto:sales@example.com')
+    
+    def test_dangerous_schemes_blocked(self):
+        """Test that script-capable schemes are removed regardless of case."""
+        for url in ('javascript:alert(1)', ' JavaScript:alert(1)', 'javascript :alert(1)',
+                    'data:text/html,<b>x</b>', 'VBSCRIPT:msgbox', 'file:///etc/passwd'):
+            self.assertEqual(safe_url(url), '', url)
+    
+    def test_schemes_hidden_by_ignored_characters_blocked(self):
+        """Test that tabs, newlines and leading control characters do not hide a scheme."""
+        for url in ('java\tscript:alert(1)', 'java\nscript:alert(1)', '\x01javascript:alert(1)'):
+            self.assertEqual(safe_url(url), '', repr(url))
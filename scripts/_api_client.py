@@ -0,0 +1,58 @@
+"""
+HTTP client helpers shared by the API test scripts.
+"""
+import json
+from functools import lru_cache
+
+import requests
+
+LOGIN_PATH = "/api/users/login/"
+
+
+class LoginFailed(Exception):
+    """Raised when a login does not produce an access token."""
+    
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response = response
+
+
+@lru_cache(maxsize=None)
+def _login_body(email, password):
+    return json.dumps({"email": email, "password": password}).encode()
+
+
+def new_session():
+    """Return a pooled session that sends JSON bodies."""
+    session = requests.Session()
+    session.headers["Content-Type"] = "application/json"
+    return session
+
+
+def login(session, login_url, email, password):
+    """
+    Log in on an existing session and return the login response.
+    
+    login_url is the base URL plus LOGIN_PATH, built once by the caller.
+    
+    On success the session sends the access token on every later request and
+    keeps the token pair on session.tokens.
+    """
+    resp = session.post(login_url, data=_login_body(email, password))
+    if resp.status_code == 200:
+        session.tokens = resp.json()
+        access = session.tokens.get("access")
+        if access:
+            session.headers["Authorization"] = f"Bearer {access}"
+    return resp
+
+
+def authenticated_session(email, password, base_url):
+    """Return a new session logged in as the given user, or raise LoginFailed."""
+    session = new_session()
+    resp = login(session, base_url + LOGIN_PATH, email, password)
+    if resp.status_code != 200:
+        raise LoginFailed(f"{resp.status_code} - {resp.text}", resp)
+    if "Authorization" not in session.headers:
+        raise LoginFailed("No access token returned", resp)
+    return session
@@ -1,76 +1,164 @@
-import requests
 import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from _api_client import LOGIN_PATH, login, new_session
 
 BASE_URL = "http://127.0.0.1:8000"
+LOGIN_URL = BASE_URL + LOGIN_PATH
+TOKEN_REFRESH_URL = BASE_URL + "/api/users/token/refresh/"
+CART_URL = BASE_URL + "/api/cart/"
+CART_ITEMS_URL = BASE_URL + "/api/cart-items/"
+ORDERS_URL = BASE_URL + "/api/orders/"
+ADMIN_ORDERS_URL = BASE_URL + "/api/admin/orders/"
+INVENTORY_URL = BASE_URL + "/api/manufacturing/inventory/"
+DASHBOARD_STATS_URL = BASE_URL + "/api/dashboard/stats/"
+
+# Accepted status codes per kind of check
+CREATE_OK = frozenset({200, 201})
+AUTH_DENIED = frozenset({401, 403})
+BAD_INPUT = frozenset({400, 404})
+THROTTLED = frozenset({423, 429})
+
+ADMIN_EMAIL = "admin@vaitikan.com"
+
+# Fixed request bodies, serialized once
+ADD_TO_CART_BODY = json.dumps({"variant_size_id": 1, "quantity": 1}).encode()
+INVALID_VARIANT_BODY = json.dumps({"variant_size_id": 99999, "quantity": 1}).encode()
+NEGATIVE_QUANTITY_BODY = json.dumps({"variant_size_id": 1, "quantity": -5}).encode()
+
+# Keep-alive connection pool for unauthenticated probes; each logged-in user
+# gets its own session carrying that user's token
+session = new_session()
+
+# Lines are written a section at a time rather than one print per probe
+_LOG_BUFFER = []
 
 def log(msg, status="INFO"):
-    print(f"[{status}] {msg}")
+    _LOG_BUFFER.append(f"[{status}] {msg}\n")
+
+def flush_log():
+    sys.stdout.write("".join(_LOG_BUFFER))
+    sys.stdout.flush()
+    _LOG_BUFFER.clear()
+
+def section(title):
+    flush_log()
+    log(f"=== {title} ===")
+
+# requests.Session is not thread-safe, so each worker thread sends through its
+# own copy of a session, sharing only the original's headers and adapter
+_worker_state = threading.local()
+
+def _init_worker(worker_sessions):
+    _worker_state.sessions = {}
+    worker_sessions.append(_worker_state.sessions)
+
+def probe(client, method, url, body=None):
+    sessions = _worker_state.sessions
+    worker_session = sessions.get(id(client))
+    if worker_session is None:
+        worker_session = sessions[id(client)] = requests.Session()
+        worker_session.headers.update(client.headers)
+        worker_session.mount(BASE_URL, client.get_adapter(BASE_URL))
+    return worker_session.request(method, url, data=body)
+
+def _close_worker_sessions(worker_sessions):
+    for sessions in worker_sessions:
+        for worker_session in sessions.values():
+            # The mounted adapter is the original session's; leave it open
+            del worker_session.adapters[BASE_URL]
+            worker_session.close()
 
 def run_comprehensive_tests():
+    try:
+        return _run_probes()
+    finally:
+        flush_log()
+
+def _run_probes():
     bugs_found = []
     
     # 1. Login as customer
-    log("=== CUSTOMER TESTS ===")
-    resp = requests.post(f"{BASE_URL}/api/users/login/", json={
-        "email": "qa_hostile_01@example.com",
-        "password": "TestPass123!"
-    })
+    section("CUSTOMER TESTS")
+    customer = new_session()
+    resp = login(customer, LOGIN_URL, "qa_hostile_01@example.com", "TestPass123!")
     if resp.status_code != 200:
         log(f"Customer login failed: {resp.status_code}", "FAIL")
         return
     
-    customer_tokens = resp.json()
-    customer_headers = {"Authorization": f"Bearer {customer_tokens['access']}"}
     log("Customer login successful", "PASS")
     
     # 2. Add to cart with correct variant_size_id
     log("Adding to cart with variant_size_id=1...")
-    resp = requests.post(f"{BASE_URL}/api/cart-items/", 
-        headers=customer_headers,
-        json={"variant_size_id": 1, "quantity": 1})
-    log(f"Add to cart: {resp.status_code}", "PASS" if resp.status_code in [200, 201] else "FAIL")
-    if resp.status_code not in [200, 201]:
-        log(f"Add to cart error: {resp.text[:300]}", "INFO")
+    resp = customer.post(CART_ITEMS_URL, data=ADD_TO_CART_BODY)
+    log(f"Add to cart: {resp.status_code}", "PASS" if resp.status_code in CREATE_OK else "FAIL")
+    if resp.status_code not in CREATE_OK:
+        log(f"Add to cart error: {resp.content[:300].decode('utf-8', errors='replace')}", "INFO")
         bugs_found.append(f"Add to cart failed: {resp.status_code}")
     
     # 3. View cart
-    resp = requests.get(f"{BASE_URL}/api/cart/", headers=customer_headers)
+    resp = customer.get(CART_URL)
     if resp.status_code == 200:
         cart_data = resp.json()
         log(f"Cart has {len(cart_data.get('items', []))} items", "INFO")
     
+    # The probes below only need the customer token and don't depend on each
+    # other, so they run concurrently; results are reported in order below.
+    probes = {
+        "admin_orders": (customer, "GET", ADMIN_ORDERS_URL),
+        "inventory": (customer, "GET", INVENTORY_URL),
+        "customer_stats": (customer, "GET", DASHBOARD_STATS_URL),
+        "anon_cart": (session, "GET", CART_URL),
+        "anon_orders": (session, "GET", ORDERS_URL),
+        "refresh": (session, "POST", TOKEN_REFRESH_URL,
+                    json.dumps({"refresh": customer.tokens.get('refresh')}).encode()),
+        "invalid_variant": (customer, "POST", CART_ITEMS_URL, INVALID_VARIANT_BODY),
+        "negative_quantity": (customer, "POST", CART_ITEMS_URL, NEGATIVE_QUANTITY_BODY),
+    }
+    worker_sessions = []
+    try:
+        with ThreadPoolExecutor(max_workers=8, initializer=_init_worker, initargs=(worker_sessions,)) as executor:
+            futures = {name: executor.submit(probe, *args) for name, args in probes.items()}
+    finally:
+        _close_worker_sessions(worker_sessions)
+    responses = {name: future.result() for name, future in futures.items()}
+    
     # 4. Permission tests
-    log("=== PERMISSION TESTS ===")
+    section("PERMISSION TESTS")
     
     # Test Admin Orders endpoint
-    resp = requests.get(f"{BASE_URL}/api/admin/orders/", headers=customer_headers)
-    if resp.status_code not in [403, 401]:
+    resp = responses["admin_orders"]
+    if resp.status_code not in AUTH_DENIED:
         bugs_found.append(f"Admin Orders returns {resp.status_code} instead of 403")
-    log(f"Customer -> Admin Orders: {resp.status_code}", "PASS" if resp.status_code in [403, 401] else "FAIL")
+    log(f"Customer -> Admin Orders: {resp.status_code}", "PASS" if resp.status_code in AUTH_DENIED else "FAIL")
     
-    resp = requests.get(f"{BASE_URL}/api/manufacturing/inventory/", headers=customer_headers)
+    resp = responses["inventory"]
     log(f"Customer -> Manufacturing Inventory: {resp.status_code}", "PASS" if resp.status_code == 403 else "FAIL")
     
-    resp = requests.get(f"{BASE_URL}/api/dashboard/stats/", headers=customer_headers)
+    resp = responses["customer_stats"]
     log(f"Customer -> Dashboard Stats: {resp.status_code}", "PASS" if resp.status_code == 403 else "FAIL")
     
     # 5. Login as admin (correct email)
-    log("=== ADMIN TESTS ===")
-    resp = requests.post(f"{BASE_URL}/api/users/login/", json={
-        "email": "admin@vaitikan.com",
-        "password": "admin123"
-    })
+    section("ADMIN TESTS")
+    admin = new_session()
+    resp = login(admin, LOGIN_URL, ADMIN_EMAIL, "admin123")
     if resp.status_code != 200:
         log(f"Admin login failed: {resp.status_code} - trying different password", "INFO")
         # Try common passwords
         for pwd in ["Admin123!", "password123", "vaitikan123"]:
-            resp = requests.post(f"{BASE_URL}/api/users/login/", json={
-                "email": "admin@vaitikan.com",
-                "password": pwd
-            })
+            resp = login(admin, LOGIN_URL, ADMIN_EMAIL, pwd)
             if resp.status_code == 200:
                 log(f"Admin login with '{pwd}' successful", "PASS")
                 break
+            if resp.status_code in THROTTLED:
+                # Further attempts would only be throttled too
+                log(f"Admin login sweep stopped: {resp.status_code}", "FAIL")
+                bugs_found.append(f"Admin login throttled ({resp.status_code})")
+                return bugs_found
         else:
             log("Admin login failed with all passwords", "FAIL")
             bugs_found.append("Admin account password unknown/not working")
@@ -78,43 +166,34 @@ def run_comprehensive_tests():
     else:
         log("Admin login successful", "PASS")
     
-    admin_tokens = resp.json()
-    admin_headers = {"Authorization": f"Bearer {admin_tokens['access']}"}
-    
     # 6. Admin access tests
-    resp = requests.get(f"{BASE_URL}/api/dashboard/stats/", headers=admin_headers)
+    resp = admin.get(DASHBOARD_STATS_URL)
     log(f"Admin -> Dashboard Stats: {resp.status_code}", "PASS" if resp.status_code == 200 else "FAIL")
     
     # 7. Unauthenticated tests
-    log("=== UNAUTHENTICATED TESTS ===")
-    resp = requests.get(f"{BASE_URL}/api/cart/")
+    section("UNAUTHENTICATED TESTS")
+    resp = responses["anon_cart"]
     log(f"No token -> Cart: {resp.status_code}", "PASS" if resp.status_code == 401 else "FAIL")
     
-    resp = requests.get(f"{BASE_URL}/api/orders/")
+    resp = responses["anon_orders"]
     log(f"No token -> Orders: {resp.status_code}", "PASS" if resp.status_code == 401 else "FAIL")
     
     # 8. Token refresh
-    log("=== TOKEN REFRESH TEST ===")
-    resp = requests.post(f"{BASE_URL}/api/users/token/refresh/", json={
-        "refresh": customer_tokens.get('refresh')
-    })
+    section("TOKEN REFRESH TEST")
+    resp = responses["refresh"]
     log(f"Token refresh: {resp.status_code}", "PASS" if resp.status_code == 200 else "FAIL")
     
     # 9. Invalid data tests
-    log("=== INPUT VALIDATION TESTS ===")
-    resp = requests.post(f"{BASE_URL}/api/cart-items/", 
-        headers=customer_headers,
-        json={"variant_size_id": 99999, "quantity": 1})
-    log(f"Add invalid variant to cart: {resp.status_code}", "PASS" if resp.status_code in [400, 404] else "FAIL")
-    
-    resp = requests.post(f"{BASE_URL}/api/cart-items/", 
-        headers=customer_headers,
-        json={"variant_size_id": 1, "quantity": -5})
+    section("INPUT VALIDATION TESTS")
+    resp = responses["invalid_variant"]
+    log(f"Add invalid variant to cart: {resp.status_code}", "PASS" if resp.status_code in BAD_INPUT else "FAIL")
+    
+    resp = responses["negative_quantity"]
     log(f"Add negative quantity: {resp.status_code}", "PASS" if resp.status_code == 400 else "FAIL")
     if resp.status_code != 400:
         bugs_found.append("Negative quantity accepted in cart")
     
-    log("=== TESTS COMPLETE ===")
+    section("TESTS COMPLETE")
     if bugs_found:
         log(f"BUGS FOUND: {len(bugs_found)}", "FAIL")
         for bug in bugs_found:
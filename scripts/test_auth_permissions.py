@@ -1,8 +1,12 @@
 
-import requests
 import sys
 
+from _api_client import LoginFailed, authenticated_session
+
 BASE_URL = "http://localhost:8000"
+CART_URL = BASE_URL + "/api/cart/"
+ADMIN_ORDERS_URL = BASE_URL + "/api/admin/orders/"
+INVENTORY_URL = BASE_URL + "/api/manufacturing/inventory/"
 EMAIL = "qa_hostile_01@example.com"
 PASSWORD = "TestPass123!"
 
@@ -13,20 +17,12 @@ def test_auth_and_permissions():
     # 1. Login
     log(f"Attempting login for {EMAIL}...")
     try:
-        resp = requests.post(f"{BASE_URL}/api/users/login/", json={"email": EMAIL, "password": PASSWORD})
-        if resp.status_code != 200:
-            log(f"Login failed: {resp.status_code} - {resp.text}", "FAIL")
-            return
-        
-        data = resp.json()
-        access_token = data.get("access")
-        if not access_token:
-            log("No access token returned", "FAIL")
-            return
-            
+        session = authenticated_session(EMAIL, PASSWORD, BASE_URL)
         log("Login successful. Token obtained.", "PASS")
-        headers = {"Authorization": f"Bearer {access_token}"}
         
+    except LoginFailed as e:
+        log(f"Login failed: {e}", "FAIL")
+        return
     except Exception as e:
         log(f"Login exception: {str(e)}", "FAIL")
         return
@@ -34,7 +30,7 @@ def test_auth_and_permissions():
     # 2. Test Customer Access (Should Succeed)
     # Checking a known customer endpoint, e.g., Products or Cart
     log("Testing Customer Access (GET /api/cart/)...")
-    resp = requests.get(f"{BASE_URL}/api/cart/", headers=headers)
+    resp = session.get(CART_URL)
     if resp.status_code == 200:
         log("Customer access verified (200 OK)", "PASS")
     else:
@@ -43,7 +39,7 @@ def test_auth_and_permissions():
     # 3. Test Admin Access (Should Fail)
     # Checking an admin endpoint
     log("Testing Admin Access (GET /api/admin/orders/)...")
-    resp = requests.get(f"{BASE_URL}/api/admin/orders/", headers=headers)
+    resp = session.get(ADMIN_ORDERS_URL)
     if resp.status_code == 403:
         log("Admin access correctly denied (403 Forbidden)", "PASS")
     else:
@@ -51,7 +47,7 @@ def test_auth_and_permissions():
         
     # 4. Test Operator Access (Should Fail)
     log("Testing Operator Access (GET /api/manufacturing/inventory/)...")
-    resp = requests.get(f"{BASE_URL}/api/manufacturing/inventory/", headers=headers)
+    resp = session.get(INVENTORY_URL)
     if resp.status_code == 403:
         log("Operator access correctly denied (403 Forbidden)", "PASS")
     else: